@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Measures how many SDK events per second SDKEventMonitor can ingest, using the
+stand-in sd module and a stand-in event handler. Compares decoding every
+event up front (as the monitor used to) with lazy, filtered decoding.
+
+    python benchmarks/bench_event_throughput.py [--events N]
+"""
+import argparse
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+import standin_sd
+standin_sd.install()
+from sd_sdk_python import sd_sdk_wireless
+
+
+class CountingListener:
+    def __init__(self, read_fields):
+        self.read_fields = read_fields
+        self.count = 0
+
+    def notify(self, event_type, event_data):
+        if self.read_fields:
+            event_data['RSSI']
+        self.count += 1
+
+
+def events(n):
+    return [standin_sd.scan_event(f"00:11:22:33:44:{i % 64:02x}") for i in range(n)]
+
+
+def run(name, n, ingest, listener=None, **subscribe):
+    monitor = sd_sdk_wireless.SDKEventMonitor(queue_size=n, workers=1)
+    if listener is not None:
+        monitor.subscribe(listener, **subscribe)
+    batch = events(n)
+    start = time.perf_counter()
+    for event in batch:
+        ingest(monitor, event)
+    ingest_seconds = time.perf_counter() - start
+    if listener is not None and standin_sd.kScanEvent in subscribe.get('event_types', ()):
+        # Wait for the dispatch worker to deliver everything
+        while listener.count < n:
+            time.sleep(0.001)
+    total_seconds = time.perf_counter() - start
+    print(f"{name:<46} ingest {n / ingest_seconds:12,.0f} events/s   "
+          f"end to end {n / total_seconds:12,.0f} events/s")
+
+
+def eager(monitor, event):
+    # What monitor_SDK did before: decode every event, then dispatch
+    monitor.notify(event.Type, sd_sdk_wireless.parse_event_data(event.Data))
+
+
+def lazy(monitor, event):
+    monitor.ingest(event)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--events', type=int, default=50000)
+    args = parser.parse_args()
+    n = args.events
+
+    run("eager decode, no scan listener", n, eager)
+    run("lazy decode, no scan listener", n, lazy)
+    run("eager decode, connection-only listener", n, eager,
+        CountingListener(False), event_types=[standin_sd.kConnectionEvent])
+    run("lazy decode, connection-only listener", n, lazy,
+        CountingListener(False), event_types=[standin_sd.kConnectionEvent])
+    run("eager decode, scan listener reading a field", n, eager,
+        CountingListener(True), event_types=[standin_sd.kScanEvent])
+    run("lazy decode, scan listener reading a field", n, lazy,
+        CountingListener(True), event_types=[standin_sd.kScanEvent])
+    run("lazy decode, scan listener ignoring fields", n, lazy,
+        CountingListener(False), event_types=[standin_sd.kScanEvent])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark of Ezairo.get_parameter_value / set_parameter_value against
+the stand-in sd module, compared with the original per-call type dispatch.
+
+    python benchmarks/bench_parameter_access.py [--rounds N]
+"""
+import argparse
+import pathlib
+import sys
+import timeit
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+import standin_sd
+from sd_sdk_python.sd_sdk import Ezairo
+
+
+def legacy_get_parameter_value(sd, product, memory_number, param_name):
+    # The lookup and dispatch performed by get_parameter_value before
+    # parameters were indexed and accessors cached
+    if memory_number == sd.kSystemNvmMemory or memory_number == sd.kSystemActiveMemory:
+        param = product.SystemMemory.Parameters.GetById(param_name)
+    else:
+        param = product.Memories[memory_number].Parameters.GetById(param_name)
+    if param.Type in [sd.kInteger, sd.kIndexedList, sd.kIndexedTextList, sd.kByte]:
+        return param.Value
+    elif param.Type == sd.kBoolean:
+        return param.BooleanValue
+    elif param.Type == sd.kDouble:
+        return param.DoubleValue
+    raise TypeError("Unknown parameter type.")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    sd = standin_sd.module()
+    product = standin_sd.Product()
+    device = Ezairo(sd, object(), None, product)
+    ids = [p.Id for p in product.Memories[0].Parameters]
+
+    def legacy_read():
+        for param_id in ids:
+            legacy_get_parameter_value(sd, product, 0, param_id)
+
+    def read():
+        for param_id in ids:
+            device.get_parameter_value(0, param_id)
+
+    def write():
+        for param_id in ids:
+            device.set_parameter_value(0, param_id, 1)
+
+    read()  # Build the index and accessors outside of the timed region
+    for name, fn in (('legacy read', legacy_read), ('read', read), ('write', write)):
+        best = min(timeit.repeat(fn, number=1, repeat=args.rounds))
+        print(f"{name:<12} {len(ids)} parameters: {best * 1e3:8.3f} ms "
+              f"({best / len(ids) * 1e9:8.1f} ns/parameter)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Measures the cost of importing sd_sdk_python in a fresh interpreter.
+
+Each measurement runs in its own subprocess so module caches do not hide the
+real startup cost. Use --ref to measure another git revision of the package
+(e.g. the commit before lazy SDK resolution) side by side with the working
+tree.
+
+    python benchmarks/bench_startup.py [--runs N] [--ref REV]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import pathlib
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+SNIPPETS = {
+    'import sd_sdk_python': "import sd_sdk_python",
+    'import sd_sdk_python.sd_sdk': "import sd_sdk_python.sd_sdk",
+    'first get_product_manager()': "import sd_sdk_python; sd_sdk_python.get_product_manager()",
+}
+
+_TIMER = """
+import time, sys
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+try:
+    exec({snippet!r})
+    status = 'ok'
+except Exception as e:
+    status = type(e).__name__
+print(time.perf_counter() - start, status)
+"""
+
+
+def measure(root, snippet, runs):
+    samples = []
+    status = 'ok'
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', _TIMER.format(root=str(root), snippet=snippet)],
+                             capture_output=True, text=True, env=os.environ.copy()).stdout.split()
+        samples.append(float(out[0]))
+        status = out[1]
+    return statistics.median(samples), status
+
+
+def export_ref(ref, target):
+    """Writes the sd_sdk_python package as of git revision 'ref' into 'target'"""
+    package = pathlib.Path(target) / 'sd_sdk_python'
+    package.mkdir()
+    names = subprocess.run(['git', 'ls-tree', '--name-only', ref, 'sd_sdk_python/'],
+                           cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.split()
+    for name in names:
+        data = subprocess.run(['git', 'show', f'{ref}:{name}'], cwd=REPO_ROOT,
+                              capture_output=True, check=True).stdout
+        (package / pathlib.Path(name).name).write_bytes(data)
+
+
+def report(label, root, runs):
+    print(f"{label}:")
+    for name, snippet in SNIPPETS.items():
+        seconds, status = measure(root, snippet, runs)
+        print(f"  {name:<30} {seconds * 1000.0:8.2f} ms  ({status})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="Number of subprocess runs per measurement")
+    parser.add_argument('--ref', default=None, help="Git revision to compare against the working tree")
+    args = parser.parse_args()
+
+    if args.ref is not None:
+        with tempfile.TemporaryDirectory() as tmp:
+            export_ref(args.ref, tmp)
+            report(args.ref, tmp, args.runs)
+    report('working tree', REPO_ROOT, args.runs)
+
+
+if __name__ == '__main__':
+    main()
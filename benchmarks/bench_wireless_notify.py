@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Measures WirelessCommAdaptor.notify throughput and the cost of calling a
+method delegated to the underlying communication interface, using the
+stand-in sd module. Compares the current attribute delegation with the
+previous __getattribute__ override.
+
+    python benchmarks/bench_wireless_notify.py [--calls N]
+"""
+import argparse
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+import standin_sd
+standin_sd.install()
+from sd_sdk_python import sd_sdk_wireless
+
+
+class LegacyAdaptor(sd_sdk_wireless.WirelessCommAdaptor):
+    # How WirelessCommAdaptor delegated before: every attribute access went
+    # through a try/except
+    def __getattribute__(self, attr):
+        try:
+            return object.__getattribute__(self, attr)
+        except AttributeError:
+            return object.__getattribute__(self, 'com_adaptor').__getattribute__(attr)
+
+
+def bench(name, adaptor, n):
+    # A connection event for the device that doesn't change its state: the
+    # common case on the event thread
+    event_data = {'DeviceID': adaptor.device_id, 'ConnectionState': str(standin_sd.kConnecting)}
+    notify = adaptor.notify
+    start = time.perf_counter()
+    for _ in range(n):
+        notify(standin_sd.kConnectionEvent, event_data)
+    notify_rate = n / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        adaptor.CloseDevice()
+    delegated_rate = n / (time.perf_counter() - start)
+    print(f"{name:<10} notify {notify_rate:12,.0f} calls/s   "
+          f"delegated method {delegated_rate:12,.0f} calls/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=500000)
+    args = parser.parse_args()
+
+    bench("legacy", LegacyAdaptor("00:11:22:33:44:55", on_event=lambda t, d: None), args.calls)
+    bench("current", sd_sdk_wireless.WirelessCommAdaptor("00:11:22:33:44:56", on_event=lambda t, d: None),
+          args.calls)
+
+
+if __name__ == '__main__':
+    main()
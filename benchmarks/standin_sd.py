@@ -0,0 +1,184 @@
+"""
+A pure Python stand-in for the parts of the Sound Designer SDK 'sd' module
+used by the benchmarks. It mimics the object model (products, memories,
+parameters) closely enough to measure the Python-side cost of sd_sdk_python
+without a programmer or the SDK binaries. Round trips to the device only
+record a call count.
+"""
+import json
+import queue
+import threading
+import types
+
+kNvmMemory0, kNvmMemory1, kNvmMemory2, kNvmMemory3, \
+    kNvmMemory4, kNvmMemory5, kNvmMemory6, kNvmMemory7 = range(8)
+kActiveMemory = 8
+kSystemNvmMemory = 9
+kSystemActiveMemory = 10
+
+kInteger, kIndexedList, kIndexedTextList, kByte, kBoolean, kDouble = range(6)
+
+kLeft, kRight = range(2)
+kNoahlinkWireless, kRSL10 = 1, 2
+kDisconnected, kConnecting, kConnected, kDisconnecting = range(4)
+kScanEvent, kConnectionEvent, kProgressEvent = range(1, 4)
+
+SYSTEM_PARAMETER_COUNT = 650
+MEMORY_PARAMETER_COUNT = 592
+
+
+class DeviceInfo:
+    pass
+
+
+class Parameter:
+    def __init__(self, param_id, param_type):
+        self.Id = param_id
+        self.Type = param_type
+        self.Value = 0
+        self.BooleanValue = False
+        self.DoubleValue = 0.0
+
+
+class Parameters(list):
+    def __init__(self, iterable=()):
+        super().__init__(iterable)
+        self._by_id = {p.Id: p for p in self}
+
+    def GetById(self, param_id):
+        return self._by_id[param_id]
+
+
+def _parameters(prefix, count):
+    types_ = (kInteger, kIndexedList, kBoolean, kDouble, kByte, kIndexedTextList)
+    return Parameters(Parameter(f"{prefix}{i:04d}", types_[i % len(types_)]) for i in range(count))
+
+
+class Product:
+    def __init__(self):
+        self.SystemMemory = types.SimpleNamespace(Parameters=_parameters('X_Sys', SYSTEM_PARAMETER_COUNT))
+        self.Memories = [types.SimpleNamespace(Parameters=_parameters('X_Mem', MEMORY_PARAMETER_COUNT))
+                         for _ in range(8)]
+        self.CurrentMemory = 0
+        self.calls = {}
+
+    def _record(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def ReadParameters(self, memory):
+        self._record('ReadParameters')
+
+    def WriteParameters(self, memory):
+        self._record('WriteParameters')
+
+
+class Event:
+    def __init__(self, event_type, data):
+        self.Type = event_type
+        self.Data = data
+
+
+class EventHandler:
+    """Hands out the events pushed to it, blocking while there are none"""
+    def __init__(self, events=()):
+        self.events = queue.Queue()
+        for event in events:
+            self.push(event)
+
+    def push(self, event):
+        self.events.put(event)
+
+    def GetEvent(self):
+        return self.events.get()
+
+
+def scan_event(device_id, rssi=-60, side=0):
+    return Event(kScanEvent, json.dumps({'Event': [
+        {'DeviceID': device_id}, {'DeviceName': 'Stand-in'}, {'RSSI': rssi},
+        {'ManufacturingData': f'6202{side:02x}0000'}]}))
+
+
+def connection_event(device_id, state):
+    return Event(kConnectionEvent, json.dumps({'Event': [
+        {'DeviceID': device_id}, {'ConnectionState': str(state)}]}))
+
+
+class CommunicationInterface:
+    """Stand-in wireless communication interface (connects immediately)"""
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self.event_handler = None
+        self.VerifyNvmWrites = False
+
+    def SetEventHandler(self, event_handler):
+        self.event_handler = event_handler
+
+    def Connect(self):
+        self.event_handler.push(connection_event(self.device_id, kConnected))
+
+    def Disconnect(self):
+        self.event_handler.push(connection_event(self.device_id, kDisconnected))
+
+    def CloseDevice(self):
+        pass
+
+
+class WirelessControl:
+    def SetCommunicationAdaptor(self, com_adaptor):
+        self.com_adaptor = com_adaptor
+
+
+class ProductManager:
+    def __init__(self):
+        self.event_handler = EventHandler()
+        # Scan events emitted (every scan_interval seconds) while scanning
+        self.scan_events = []
+        self.scan_interval = 0.001
+        self._scanning = None
+
+    def GetEventHandler(self):
+        return self.event_handler
+
+    def CreateWirelessCommunicationInterface(self, device_id):
+        return CommunicationInterface(device_id)
+
+    def GetWirelessControl(self):
+        return WirelessControl()
+
+    def BeginScanForWirelessDevices(self, programmer, com_port, side, options, clear_bond_table):
+        self._record('BeginScanForWirelessDevices')
+        scanning = self._scanning = threading.Event()
+
+        def _emit():
+            for event in self.scan_events:
+                if scanning.wait(self.scan_interval):
+                    return
+                self.event_handler.push(event)
+        threading.Thread(target=_emit, daemon=True).start()
+        return scanning
+
+    def EndScanForWirelessDevices(self, async_result):
+        self._record('EndScanForWirelessDevices')
+        async_result.set()
+        return []
+
+    def _record(self, name):
+        self.calls = getattr(self, 'calls', {})
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+
+def install():
+    """
+    Makes sd_sdk_python use this module as 'sd' (and a stand-in
+    ProductManager) so that the SDK-dependent modules can be imported.
+    """
+    import sd_sdk_python
+    sd_sdk_python.sd = module()
+    sd_sdk_python._pm = ProductManager()
+    return sd_sdk_python._pm
+
+
+def module():
+    """Returns this module, for passing as Ezairo's 'sd' field"""
+    import sys
+    return sys.modules[__name__]
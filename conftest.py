@@ -75,8 +75,10 @@ def product_name(request):
 
 @pytest.fixture
 def product_library(product_manager, product_name):
+    from sd_sdk_python import load_library
     sdk_root = Path(os.environ['SD_SDK_ROOT'])
-    return product_manager.LoadLibraryFromFile(str(sdk_root / f"products/{product_name}.library"))
+    # Loaded once per session unless the file changes
+    return load_library(sdk_root / f"products/{product_name}.library")
 
 @pytest.fixture
 def product(product_manager, product_library):
@@ -160,3 +162,34 @@ def configured_device(sd, Ezairo, communication_interface, product, product_name
 
     yield Ezairo(sd, communication_interface, device_info, product)
     product.CloseDevice()
+
+
+######################################################################
+## A fake product for the tests that do not need the SDK installed ##
+######################################################################
+
+class FakeProduct:
+    """Keeps the manufacturer data area in memory and records device access"""
+    Definition = type('Definition', (), {'ManufacturerDataAreaLength': 64})
+
+    def __init__(self):
+        self.data = bytearray(range(64))
+        self.calls = []
+
+    def ReadManufacturerData(self, offset, length):
+        self.calls.append(('read', offset, length))
+        return bytes(self.data[offset:offset + length])
+
+    def WriteManufacturerData(self, offset, length, data):
+        self.calls.append(('write', offset, length))
+        self.data[offset:offset + length] = data
+
+    def ReadVoiceAlertsTotalMemory(self):
+        return 1024
+
+    def WriteVoiceAlert(self, length, data):
+        self.calls.append(('voice', length))
+
+@pytest.fixture
+def fake_product():
+    return FakeProduct()
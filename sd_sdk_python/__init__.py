@@ -18,10 +18,21 @@ import sys
 import os
 import pathlib
 import logging
+import threading
+import time
+import importlib
 
 
 _WIN_SAMPLES_PATH = 'samples/win/bin'
 
+# The SDK is resolved (and the ProductManager created) on first use rather
+# than at import time so that processes which only need the pure Python
+# helpers (e.g. DeviceInfo or the device name codec) do not pay for it.
+_sdk_lock = threading.RLock()
+_sd = None
+_pm = None
+_startup_timings = {}
+
 def __get_run_path():
     """Returns the directory of this script"""
     # This check is required if the script has been frozen via py2exe
@@ -33,6 +44,7 @@ def __get_run_path():
 
 def __resolve_sdk():
     """Sets the SDK environment variables and imports the sd module"""
+    global _sd
     sdk_root = pathlib.Path(os.environ.get('SD_SDK_ROOT', __get_run_path()))
     if not sdk_root.exists() or not sdk_root.is_dir():
         raise ImportError(f'{str(sdk_root)} is not a valid location. Make sure you set %SD_SDK_ROOT% appropriately in your environment.')
@@ -61,14 +73,54 @@ def __resolve_sdk():
     os.environ["PATH"] += os.pathsep + str(sdk_module.parent)
     sys.path.append(str(sdk_module.parent))
     import sd
+    _sd = sd
     globals()["sd"] = sd
 
 
-__resolve_sdk()
+def get_sdk():
+    """Returns the sd module, resolving the SDK on first use (thread-safe)"""
+    if _sd is None:
+        with _sdk_lock:
+            if _sd is None:
+                start = time.perf_counter()
+                __resolve_sdk()
+                _startup_timings['resolve_sdk'] = time.perf_counter() - start
+    return _sd
 
-__pm = sd.ProductManager()
 
 def get_product_manager():
-    return __pm
-
-__all__ = ["sd", "get_product_manager", "sd_sdk"]
+    """Returns the process-wide ProductManager, creating it on first use (thread-safe)"""
+    global _pm
+    if _pm is None:
+        with _sdk_lock:
+            if _pm is None:
+                sd = get_sdk()
+                start = time.perf_counter()
+                _pm = sd.ProductManager()
+                _startup_timings['product_manager'] = time.perf_counter() - start
+    return _pm
+
+
+def get_startup_timings():
+    """
+    Returns a dict of the time (in seconds) spent on each lazily performed
+    startup step so far ('resolve_sdk', 'product_manager', 'event_monitor').
+    Steps that have not happened yet in this process are absent.
+    """
+    return dict(_startup_timings)
+
+
+def __getattr__(name):
+    # Module level __getattr__ (PEP 562) so that 'sd_sdk_python.sd' and
+    # 'from sd_sdk_python import sd' keep working while resolving lazily.
+    if name == 'sd':
+        return get_sdk()
+    if name in ('sd_sdk', 'sd_sdk_wireless'):
+        return importlib.import_module(f'{__name__}.{name}')
+    if name in ('load_library', 'prewarm_libraries', 'get_library_metrics'):
+        return getattr(importlib.import_module(f'{__name__}.sd_sdk_library'), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["sd", "get_sdk", "get_product_manager", "get_startup_timings", "sd_sdk",
+           "load_library", "prewarm_libraries", "get_library_metrics"]
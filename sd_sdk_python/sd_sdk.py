@@ -16,9 +16,17 @@ A Python module exposing useful utilities for the Sound Designer SDK.
 # ----------------------------------------------------------------------------
 
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import sys
-import struct
+import bisect
+import fnmatch
+
+from sd_sdk_python.sd_sdk_fields import DEVICE_NAME
+from sd_sdk_python.sd_sdk_metrics import timed_call
+# The other helper modules (dumps, snapshots, futures, the param file cache,
+# scratch memory and voice alerts) pull in json, csv, hashlib, mmap and
+# concurrent.futures, so they are imported by the methods that use them to
+# keep importing this module cheap.
 
 
 def convert_value(value):
@@ -76,25 +84,206 @@ class DeviceInfo:
     def to_dict(self,) -> dict:
         return {k:v for k,v in self.__dict__.items() if not k.startswith('_')}
 
+class ParameterIndex:
+    """
+    An index over the parameters of one memory (system or profile) that is
+    built by walking the memory through the binding once. Lookups by id are
+    dictionary lookups, and prefix/glob queries bisect a sorted id list
+    instead of walking every parameter.
+    """
+    def __init__(self, parameters):
+        self.parameters = list(parameters)
+        self.by_id = {}
+        for p in self.parameters:
+            self.by_id[p.Id] = p
+        # (id, position in memory) pairs sorted by id so that query results
+        # can be returned in the same order as the memory iterates
+        self._sorted = sorted((p.Id, i) for i, p in enumerate(self.parameters))
+        self._sorted_ids = [w[0] for w in self._sorted]
+
+    def __len__(self):
+        return len(self.parameters)
+
+    def get(self, param_id):
+        return self.by_id.get(param_id)
+
+    def _positions_with_prefix(self, prefix):
+        positions = []
+        for i in range(bisect.bisect_left(self._sorted_ids, prefix), len(self._sorted)):
+            param_id, position = self._sorted[i]
+            if not param_id.startswith(prefix):
+                break
+            positions.append(position)
+        return positions
+
+    def with_prefix(self, prefix):
+        """Returns the parameters whose id starts with prefix, in memory order"""
+        return [self.parameters[i] for i in sorted(self._positions_with_prefix(prefix))]
+
+    def matching(self, pattern):
+        """Returns the parameters whose id matches the glob pattern, in memory order"""
+        # Only the ids sharing the literal prefix of the pattern can match
+        literal = len(pattern)
+        for special in '*?[':
+            found = pattern.find(special)
+            if found >= 0:
+                literal = min(literal, found)
+        positions = self._positions_with_prefix(pattern[:literal])
+        return [self.parameters[i] for i in sorted(positions)
+                if fnmatch.fnmatchcase(self.parameters[i].Id, pattern)]
+
+
+@dataclass
+class ShadowCacheStats:
+    # EEPROM reads served from the host (i.e. avoided device round trips)
+    hits: int = 0
+    # EEPROM reads that had to read the memory from the device
+    misses: int = 0
+
+
 @dataclass
 class Ezairo:
     sd: object
     interface: object
     device_info: object
     product: object
+    # When True, EEPROM getters serve values from the host-side copy of a
+    # memory while it is known to match NVM (see get_*_parameter_in_EEPROM)
+    shadow_nvm: bool = False
+    shadow_stats: ShadowCacheStats = field(default_factory=ShadowCacheStats, init=False)
+    # Parameter indexes keyed by memory ('system' or the profile memory
+    # number), built on first use for the product they were built from
+    _parameter_indexes: dict = field(default_factory=dict, init=False, repr=False)
+    _indexed_product: object = field(default=None, init=False, repr=False)
+    # (parameter, value attribute, memory key) keyed by (memory, parameter id)
+    _accessors: dict = field(default_factory=dict, init=False, repr=False)
+    # Memory keys whose host-side values were changed since they were last
+    # read from or written to NVM
+    _dirty: set = field(default_factory=set, init=False, repr=False)
+    # Memory keys whose host-side values were read from or written to NVM
+    # through _shadow_interface (coherent unless also dirty)
+    _coherent: set = field(default_factory=set, init=False, repr=False)
+    _shadow_interface: object = field(default=None, init=False, repr=False)
+    # Maps an SDK parameter type to the attribute holding its value
+    _value_attributes: dict = field(default=None, init=False, repr=False)
+    _voice_alert_total_memory: int = field(default=None, init=False, repr=False)
+    # Manufacturer data read or written through the interface it was created
+    # for (only kept with shadow_nvm)
+    _scratch: object = field(default=None, init=False, repr=False)
+    _scratch_interface: object = field(default=None, init=False, repr=False)
 
     def __post_init__(self):
         if type(self.device_info) == self.sd.DeviceInfo:
             # Convert to richer dataclass automatically
             self.device_info = DeviceInfo(self.device_info)
 
-    def load_param_file(self, param_file, configure_device=False, write_manufacturer_data=False, write_voice_alerts=False):
-        if self.product is not None:
-            self.product.LoadParamFile(str(param_file), configure_device, write_manufacturer_data, write_voice_alerts)
+    def load_param_file(self, param_file, configure_device=False, write_manufacturer_data=False, write_voice_alerts=False,
+                        only_differences=False, cache=None):
+        """
+        Loads a param file into the device (and the host-side parameters).
+
+        With only_differences, the parameter state a param file produces is
+        remembered in 'cache' (default: the process-wide param_file_cache),
+        keyed by the file's content hash and the product definition. When
+        the same content is loaded again, the device's NVM memories are read
+        (or served from the shadow cache when shadow_nvm is set), compared
+        with the remembered state, and only the memories that differ are
+        written. Loads that also configure the device or write manufacturer
+        data or voice alerts, and files not seen before, use a full
+        LoadParamFile.
+
+        Returns the memory numbers written when only the differences were
+        written, otherwise None.
+        """
+        if self.product is None:
+            return None
+        full_load = configure_device or write_manufacturer_data or write_voice_alerts
+        if only_differences and not full_load:
+            if cache is None:
+                from sd_sdk_python.sd_sdk_paramfile import param_file_cache as cache
+            key = cache.key(cache.digest(param_file), self.product)
+            target = cache.get(key)
+            if target is not None:
+                for memory_number in target.layout.memories:
+                    self._read_through_shadow(memory_number)
+                return self.apply_snapshot(target)
+        try:
+            timed_call('LoadParamFile', self.product.LoadParamFile, str(param_file), configure_device,
+                       write_manufacturer_data, write_voice_alerts, device=self.device_info)
+        finally:
+            # Even a failed load may have written part of the file, so the
+            # device no longer matches what was cached
+            if write_voice_alerts:
+                from sd_sdk_python.sd_sdk_voice import voice_alert_registry
+                voice_alert_registry.forget(self.device_info)
+            self.invalidate_shadow_cache()
+        # The param file was written to the device and to the host
+        self._dirty.clear()
+        if configure_device:
+            # Configuring the device can change the library on the device
+            self.invalidate_parameter_index()
+        if only_differences and not full_load:
+            cache.put(key, self.snapshot())
+        return None
+
+    def begin_load_param_file(self, param_file, configure_device=False, write_manufacturer_data=False,
+                              write_voice_alerts=False, on_progress=None):
+        """
+        Starts loading a param file with BeginLoadParamFile and returns an
+        SDKFuture for it (see load_param_file).
+        """
+        if self.product is None:
+            return None
+        from sd_sdk_python.sd_sdk_async import SDKFuture
+        future = SDKFuture(timed_call('BeginLoadParamFile', self.product.BeginLoadParamFile, str(param_file),
+                                      configure_device, write_manufacturer_data, write_voice_alerts,
+                                      device=self.device_info),
+                           name=f"LoadParamFile({param_file})", on_progress=on_progress)
+
+        def _loaded(f):
+            # Even a failed or cancelled load may have written part of the
+            # file, so the device no longer matches what was cached
+            if write_voice_alerts:
+                from sd_sdk_python.sd_sdk_voice import voice_alert_registry
+                voice_alert_registry.forget(self.device_info)
+            self.invalidate_shadow_cache()
+            if f.cancelled() or f.exception() is not None:
+                # Changes not burned yet still need burning
+                return
+            # The param file was written to the device and to the host
+            self._dirty.clear()
+            if configure_device:
+                self.invalidate_parameter_index()
+        future.add_done_callback(_loaded)
+        return future
 
     def reset(self,):
         if self.product is not None:
             self.product.ResetDevice()
+            self.invalidate_shadow_cache()
+
+    def invalidate_shadow_cache(self,):
+        """Forgets which memories are known to match NVM so the next EEPROM reads go to the device"""
+        self._coherent.clear()
+        self._shadow_interface = None
+        self._scratch = None
+
+    def _read_through_shadow(self, memory_number):
+        # Reads an NVM memory from the device unless the shadow cache is
+        # enabled and the host already holds what is in NVM
+        if self.shadow_nvm:
+            if self._shadow_interface is not self.interface:
+                # Reconnected (or a different interface) since the last read
+                self.invalidate_shadow_cache()
+            key = self._memory_key(memory_number)
+            if key in self._coherent and key not in self._dirty:
+                self.shadow_stats.hits += 1
+                return
+            self.shadow_stats.misses += 1
+        if memory_number == self.sd.kSystemNvmMemory:
+            self.restore_system_parameters()
+        else:
+            self.restore_profile_parameters(memory_number)
 
     def mute(self,):
         if self.product is not None:
@@ -116,60 +305,119 @@ class Ezairo:
         if self.product is not None:
             self.product.SwitchToMemory(memory_number)
             if self.interface is not None and read_parameters:
-                self.product.ReadParameters(self.sd.kActiveMemory)
+                self._read_parameters(self.sd.kActiveMemory)
+
+    def _value_attribute(self, param):
+        """Returns the name of the attribute holding the value of a parameter"""
+        if self._value_attributes is None:
+            self._value_attributes = {
+                self.sd.kInteger: 'Value',
+                self.sd.kIndexedList: 'Value',
+                self.sd.kIndexedTextList: 'Value',
+                self.sd.kByte: 'Value',
+                self.sd.kBoolean: 'BooleanValue',
+                self.sd.kDouble: 'DoubleValue',
+            }
+        attribute = self._value_attributes.get(param.Type)
+        if attribute is None:
+            raise TypeError(f"Unknown parameter type {param.Type} for parameter {param.Id}")
+        return attribute
+
+    def parameter_accessor(self, memory_number, param_name):
+        """
+        Returns a (parameter, value attribute name, memory key) tuple for a
+        parameter, where the memory key is 'system' or the profile memory
+        number. The tuple is resolved on first use and cached, so repeated
+        reads and writes skip both the lookup and the type dispatch.
+        """
+        if self.product is None:
+            return None
+        if self._indexed_product is not self.product:
+            self.parameter_index(memory_number)
+        # The active memory moves with CurrentMemory so it is resolved first
+        key = self._memory_key(memory_number) if memory_number == self.sd.kActiveMemory else memory_number
+        accessor = self._accessors.get((key, param_name))
+        if accessor is None:
+            param = self.find_parameter(key, param_name)
+            if param is None:
+                return None
+            accessor = (param, self._value_attribute(param), self._memory_key(key))
+            self._accessors[(key, param_name)] = accessor
+        return accessor
 
     def get_parameter_value(self, memory_number, param_name):
-        param = self.find_parameter(memory_number, param_name)
-        value = None
-        if param is not None:
-            if param.Type in [self.sd.kInteger, self.sd.kIndexedList, self.sd.kIndexedTextList, self.sd.kByte]:
-                value = param.Value
-            elif param.Type == self.sd.kBoolean:
-                value = param.BooleanValue
-            elif param.Type == self.sd.kDouble:
-                value = param.DoubleValue
-            else:
-                raise "Unknown parameter type."
-
-        # print("%s: %s" % (param_name, value))
-        return value
+        accessor = self._accessors.get((memory_number, param_name))
+        if accessor is None or self._indexed_product is not self.product:
+            accessor = self.parameter_accessor(memory_number, param_name)
+            if accessor is None:
+                return None
+        return getattr(accessor[0], accessor[1])
 
     def set_parameter_value(self, memory_number, param_name, value):
-        param = self.find_parameter(memory_number, param_name)
-        if param is not None:
-            if param.Type in [self.sd.kInteger, self.sd.kIndexedList, self.sd.kIndexedTextList, self.sd.kByte]:
-                param.Value = value
-            elif param.Type == self.sd.kBoolean:
-                param.BooleanValue = value
-            elif param.Type == self.sd.kDouble:
-                param.DoubleValue = value
-            else:
-                raise "Unknown parameter type."
-            #print("Setting %s to %s" % (param_name, value))
+        accessor = self._accessors.get((memory_number, param_name))
+        if accessor is None or self._indexed_product is not self.product:
+            accessor = self.parameter_accessor(memory_number, param_name)
+            if accessor is None:
+                return
+        setattr(accessor[0], accessor[1], value)
+        self._dirty.add(accessor[2])
+
+    def invalidate_parameter_index(self,):
+        """Discards all parameter indexes (e.g. after the product or library changed)"""
+        self._parameter_indexes.clear()
+        self._accessors.clear()
+        self._dirty.clear()
+        self.invalidate_shadow_cache()
+        self._indexed_product = None
+        self._voice_alert_total_memory = None
+
+    def _memory_key(self, memory_number):
+        # Both system memories share the same parameters, and the active
+        # memory is the current profile memory
+        if memory_number == self.sd.kSystemNvmMemory or memory_number == self.sd.kSystemActiveMemory:
+            return 'system'
+        if memory_number == self.sd.kActiveMemory:
+            return self.product.CurrentMemory
+        return memory_number
+
+    def _memory_parameters(self, key):
+        if key == 'system':
+            return self.product.SystemMemory.Parameters
+        return self.product.Memories[key].Parameters
+
+    def parameter_index(self, memory_number):
+        """Returns the ParameterIndex for a memory, building it on first use"""
+        if self.product is None:
+            return None
+        if self._indexed_product is not self.product:
+            # A different product was attached since the indexes were built
+            self.invalidate_parameter_index()
+            self._indexed_product = self.product
+        key = self._memory_key(memory_number)
+        index = self._parameter_indexes.get(key)
+        if index is None:
+            index = ParameterIndex(self._memory_parameters(key))
+            self._parameter_indexes[key] = index
+        return index
 
     def find_parameter(self, memory_number, param_name):
         if self.product is not None:
-            if memory_number == self.sd.kSystemNvmMemory or memory_number == self.sd.kSystemActiveMemory:
-                return self.product.SystemMemory.Parameters.GetById(param_name)
-            else:
-                if memory_number == self.sd.kActiveMemory:
-                    memory_number = self.product.CurrentMemory
-                return self.product.Memories[memory_number].Parameters.GetById(param_name)
+            param = self.parameter_index(memory_number).get(param_name)
+            if param is None:
+                # Let the SDK report unknown ids the way it always has
+                return self._memory_parameters(self._memory_key(memory_number)).GetById(param_name)
+            return param
 
     def find_parameters_with_prefix(self, memory_number, param_name_prefix):
-        parameters_found = []
         if self.product is not None:
-            if memory_number == self.sd.kSystemNvmMemory or memory_number == self.sd.kSystemActiveMemory:
-                for p in self.product.SystemMemory.Parameters:
-                    if p.Id.startswith(param_name_prefix):
-                        parameters_found.append(p)
-            else:
-                if memory_number == self.sd.kActiveMemory:
-                    memory_number = self.product.CurrentMemory
-                for p in self.product.Memories[memory_number].Parameters:
-                    if p.Id.startswith(param_name_prefix):
-                        parameters_found.append(p)
-        return parameters_found
+            return self.parameter_index(memory_number).with_prefix(param_name_prefix)
+        return []
+
+    def find_parameters_matching(self, memory_number, pattern):
+        """Returns the parameters whose id matches a glob pattern (e.g. 'X_RF_*Name?')"""
+        if self.product is not None:
+            return self.parameter_index(memory_number).matching(pattern)
+        return []
 
     def count_parameters(self,):
         if self.product is not None:
@@ -185,121 +433,369 @@ class Ezairo:
 
     def restore_system_parameters(self,):
         if self.product is not None and self.interface is not None:
-            self.product.ReadParameters(self.sd.kSystemNvmMemory)
+            self._read_parameters(self.sd.kSystemNvmMemory)
 
     def restore_profile_parameters(self, memory):
         if self.product is not None and self.interface is not None:
-            self.product.ReadParameters(memory)
+            self._read_parameters(memory)
 
     def burn_all_parameters(self,):
+        """Writes the system memory and every profile memory to NVM (see burn_parameters)"""
+        return self.burn_parameters(force_all=True)
+
+    def burn_parameters(self, force_all=False):
+        """
+        Writes to NVM only the memories changed through this object since they
+        were last read or written (or every memory when force_all is True).
+        Returns a dict of {memory number: seconds taken} for the memories
+        written, in the order they were written.
+        """
+        written = {}
         if self.product is not None and self.interface is not None:
-            self.product.WriteParameters(self.sd.kSystemNvmMemory)
-            for i in range(len(self.product.Memories)):
-                self.product.WriteParameters(i)
-
-    def write_voice_alert_data(self, voice_alert_data: bytes):
-        if self.product is not None and self.interface is not None:
-            data_len = len(voice_alert_data)
-            assert data_len <= self.product.ReadVoiceAlertsTotalMemory(), f"Not enough space for {data_len} bytes of voice alerts"
-            self.product.WriteVoiceAlert(data_len, voice_alert_data)
+            memories = [self.sd.kSystemNvmMemory] + list(range(len(self.product.Memories)))
+            for memory_number in memories:
+                if force_all or self._memory_key(memory_number) in self._dirty:
+                    start = time.perf_counter()
+                    self._write_parameters(memory_number)
+                    written[memory_number] = time.perf_counter() - start
+        return written
+
+    def dirty_memories(self,):
+        """Returns the NVM memory numbers with changes that have not been burned yet"""
+        return sorted(self.sd.kSystemNvmMemory if key == 'system' else key for key in self._dirty)
+
+    def _read_parameters(self, memory_number):
+        # All parameter reads from the device go through here
+        timed_call('ReadParameters', self.product.ReadParameters, memory_number,
+                   memory=memory_number, device=self.device_info)
+        key = self._memory_key(memory_number)
+        if memory_number != self.sd.kActiveMemory and memory_number != self.sd.kSystemActiveMemory:
+            # The host now holds what is in NVM
+            self._dirty.discard(key)
+            self._mark_coherent(key)
+        else:
+            # The host now holds what is in RAM, which may differ from NVM
+            self._coherent.discard(key)
+
+    def _mark_coherent(self, key):
+        if self._shadow_interface is not self.interface:
+            self._coherent.clear()
+            self._shadow_interface = self.interface
+        self._coherent.add(key)
+
+    def _write_parameters(self, memory_number):
+        # All parameter writes to the device go through here
+        timed_call('WriteParameters', self.product.WriteParameters, memory_number,
+                   memory=memory_number, device=self.device_info)
+        if memory_number != self.sd.kActiveMemory and memory_number != self.sd.kSystemActiveMemory:
+            # Writes to RAM leave NVM (and so the dirty state) unchanged
+            key = self._memory_key(memory_number)
+            self._dirty.discard(key)
+            self._mark_coherent(key)
+
+    def write_voice_alert_data(self, voice_alert_data, hash_offset=None, force=False, on_progress=None):
+        """
+        Writes voice alerts given as bytes, a bytes-like buffer (e.g. mmap) or
+        the path of a file (which is memory-mapped rather than read).
+
+        Unless force is True, the write is skipped when the device already
+        holds the same voice alerts, judged by a content hash. With
+        hash_offset, the hash is stored in (and read back from the device
+        by every call, unless shadow_nvm is set) the manufacturer data area
+        at that offset (HASH_SIZE bytes); otherwise it is remembered by this
+        process per device serial ID.
+
+        on_progress is called with ('hash', fraction) while hashing and
+        ('write', 0.0 / 1.0) around the write. Returns True if the voice
+        alerts were written, False if skipped.
+        """
+        if self.product is None or self.interface is None:
+            return False
+        from sd_sdk_python.sd_sdk_voice import content_hash, open_voice_alerts, voice_alert_registry
+        scratch = self.scratch_memory() if hash_offset is not None else None
+        with open_voice_alerts(voice_alert_data) as view:
+            data_len = len(view)
+            digest = content_hash(view, on_progress)
+            if not force and self._voice_alert_hash(hash_offset, scratch) == digest:
+                return False
+            if self._voice_alert_total_memory is None:
+                self._voice_alert_total_memory = self.product.ReadVoiceAlertsTotalMemory()
+            assert data_len <= self._voice_alert_total_memory, f"Not enough space for {data_len} bytes of voice alerts"
+            if on_progress is not None:
+                on_progress('write', 0.0)
+            # The binding takes bytes, so anything else is copied once here
+            data = voice_alert_data if isinstance(voice_alert_data, bytes) else bytes(view)
+            timed_call('WriteVoiceAlert', self.product.WriteVoiceAlert, data_len, data,
+                       device=self.device_info, nbytes=data_len)
+            del data
+        if scratch is not None:
+            scratch.write_bytes(hash_offset, digest)
+            scratch.flush()
+        voice_alert_registry.set(self.device_info, digest)
+        if on_progress is not None:
+            on_progress('write', 1.0)
+        return True
 
-    def write_scratch_memory(self, scratch_memory: list[int]):
+    def _voice_alert_hash(self, hash_offset, scratch):
+        # The hash of the voice alerts on the device, if known
+        from sd_sdk_python.sd_sdk_voice import HASH_SIZE, voice_alert_registry
+        if hash_offset is not None:
+            return scratch.read_bytes(hash_offset, HASH_SIZE)
+        return voice_alert_registry.get(self.device_info)
+
+    def scratch_memory(self,):
+        """
+        Returns a ScratchMemory word view of the manufacturer data area that
+        reads on demand and only writes back the words changed (see flush()).
+
+        With shadow_nvm, the same view (and so what it has read) is kept
+        while the product and interface stay the same, like the shadow of
+        the parameter memories. Otherwise every call returns a new view, so
+        nothing is assumed about the device between calls.
+        """
+        from sd_sdk_python.sd_sdk_scratch import ScratchMemory
+        if not self.shadow_nvm:
+            return ScratchMemory(self.product)
+        if self._scratch is None or self._scratch.product is not self.product or \
+                self._scratch_interface is not self.interface:
+            self._scratch = ScratchMemory(self.product)
+            self._scratch_interface = self.interface
+        return self._scratch
+
+    def write_scratch_memory(self, scratch_memory: list[int], offset=0):
+        """
+        Writes 32-bit words to the manufacturer data area, starting at word
+        'offset'. With shadow_nvm, only the words that differ from what was
+        last read or written through this object are sent to the device;
+        otherwise they are all written.
+        """
         if self.product is not None and self.interface is not None:
-            scratch_data = struct.pack('>' +'I'*len(scratch_memory), *scratch_memory)
-            data_len = len(scratch_data)
+            from sd_sdk_python.sd_sdk_scratch import WORD_SIZE
+            data_len = (offset + len(scratch_memory)) * WORD_SIZE
             assert data_len <= self.product.Definition.ManufacturerDataAreaLength, f"Not enough space for {data_len} bytes of scratch memory"
-            self.product.WriteManufacturerData(0, data_len, scratch_data)
+            scratch = self.scratch_memory()
+            scratch[offset:offset + len(scratch_memory)] = scratch_memory
+            return scratch.flush()
 
-    def read_scratch_memory(self,):
+    def read_scratch_memory(self, offset=0, length=None):
+        """Reads 'length' bytes (default: to the end of the area) of the manufacturer data area at 'offset'"""
         if self.product is not None and self.interface is not None:
-            return self.product.ReadManufacturerData(0, self.product.Definition.ManufacturerDataAreaLength)
+            if length is None:
+                length = self.product.Definition.ManufacturerDataAreaLength - offset
+            return timed_call('ReadManufacturerData', self.product.ReadManufacturerData, offset, length,
+                              device=self.device_info, nbytes=length)
 
     def get_profile_parameter_in_RAM(self, param_name):
         return self.get_parameter_value(self.sd.kActiveMemory, param_name)
 
     def set_profile_parameter_in_RAM(self, param_name, value):
         self.set_parameter_value(self.sd.kActiveMemory, param_name, value)
-        self.product.WriteParameters(self.sd.kActiveMemory)
+        self._write_parameters(self.sd.kActiveMemory)
 
     def get_global_parameter_in_RAM(self, param_name):
         return self.get_parameter_value(self.sd.kSystemActiveMemory, param_name)
 
     def set_global_parameter_in_RAM(self, param_name, value):
         self.set_parameter_value(self.sd.kSystemActiveMemory, param_name, value)
-        self.product.WriteParameters(self.sd.kSystemActiveMemory)
+        self._write_parameters(self.sd.kSystemActiveMemory)
 
-    def get_profile_parameter_in_EEPROM(self, param_name, nvm_memory):
+    def check_nvm_memory(self, nvm_memory):
         if nvm_memory not in [self.sd.kNvmMemory0, self.sd.kNvmMemory1, self.sd.kNvmMemory2, self.sd.kNvmMemory3, 
                               self.sd.kNvmMemory4, self.sd.kNvmMemory5, self.sd.kNvmMemory6, self.sd.kNvmMemory7]:
             raise RuntimeError("%d is not a supported EEPROM memory!" % nvm_memory)
-        self.restore_profile_parameters(nvm_memory)
+
+    def get_profile_parameter_in_EEPROM(self, param_name, nvm_memory):
+        self.check_nvm_memory(nvm_memory)
+        self._read_through_shadow(nvm_memory)
         return self.get_parameter_value(nvm_memory, param_name)
 
     def set_profile_parameter_in_EEPROM(self, param_name, value, nvm_memory):
-        if nvm_memory not in [self.sd.kNvmMemory0, self.sd.kNvmMemory1, self.sd.kNvmMemory2, self.sd.kNvmMemory3, 
-                              self.sd.kNvmMemory4, self.sd.kNvmMemory5, self.sd.kNvmMemory6, self.sd.kNvmMemory7]:
-            raise RuntimeError("%d is not a supported EEPROM memory!" % nvm_memory)
+        self.check_nvm_memory(nvm_memory)
         self.set_parameter_value(nvm_memory, param_name, value)
-        self.product.WriteParameters(nvm_memory)
+        self._write_parameters(nvm_memory)
 
     def set_global_parameter_in_EEPROM(self, param_name, value):
         self.set_parameter_value(self.sd.kSystemNvmMemory, param_name, value)
-        self.product.WriteParameters(self.sd.kSystemNvmMemory)
+        self._write_parameters(self.sd.kSystemNvmMemory)
+
+    def batch(self,):
+        """
+        Returns a ParameterBatch that stages parameter changes and writes
+        them with one WriteParameters per touched memory when committed:
+
+            with device.batch() as batch:
+                for i, value in enumerate(values):
+                    batch.set_global_parameter_in_EEPROM(f'X_RF_DeviceName{i}', value)
+        """
+        return ParameterBatch(self)
+
+    def set_many(self, memory_values):
+        """
+        Sets many parameters across memories with at most one WriteParameters
+        per memory. 'memory_values' maps a memory number (e.g. kSystemNvmMemory,
+        kActiveMemory or kNvmMemory3) to a dict of {param_name: value}.
+        Returns the list of memories written.
+        """
+        batch = self.batch()
+        for memory_number, values in memory_values.items():
+            batch.update(memory_number, values)
+        return batch.commit()
 
     def get_global_parameter_in_EEPROM(self, param_name):
-        self.restore_system_parameters()
+        self._read_through_shadow(self.sd.kSystemNvmMemory)
         return self.get_parameter_value(self.sd.kSystemNvmMemory, param_name)
 
-    def dump_parameters(self, file_obj=None):
+    def iter_parameters(self, memories=None):
+        """
+        Yields a ParameterRecord(memory, id, value) for every parameter of the
+        given memories (default: kSystemNvmMemory followed by every profile
+        memory). Values are read straight from the parameter objects of each
+        memory's index, without looking each parameter up again.
+        """
+        if self.product is None:
+            return
+        from sd_sdk_python.sd_sdk_dump import ParameterRecord
+        if memories is None:
+            memories = [self.sd.kSystemNvmMemory] + list(range(len(self.product.Memories)))
+        value_attribute = self._value_attribute
+        for memory_number in memories:
+            for p in self.parameter_index(memory_number).parameters:
+                yield ParameterRecord(memory_number, p.Id, getattr(p, value_attribute(p)))
+
+    def snapshot(self,):
+        """Returns a ParameterSnapshot of the host-side values of all system and profile parameters"""
+        from sd_sdk_python.sd_sdk_snapshot import ParameterSnapshot
+        return ParameterSnapshot.capture(self)
+
+    def apply_snapshot(self, target, current=None):
+        """
+        Writes to NVM only the parameters that differ between 'current' (a
+        snapshot of this device; taken now if not given) and 'target', with
+        one WriteParameters per memory that differs. Returns the memories
+        written.
+
+        When 'current' is taken now it holds the host-side values, so
+        memories with changes that have not been burned yet are written too
+        (their NVM may differ from target even where the host does not).
+        """
+        if current is None:
+            current = self.snapshot()
+            delta = current.diff(target)
+            for memory_number in self.dirty_memories():
+                if memory_number in target.layout.memories:
+                    delta.setdefault(memory_number, {})
+        else:
+            delta = current.diff(target)
+        return self.set_many(delta)
+
+    def dump_parameters(self, file_obj=None, format='text', memories=None):
+        """
+        Streams the parameters of the given memories (default: all) to
+        file_obj (default: stdout) in one of the sd_sdk_dump formats: 'text'
+        (id=value lines), 'jsonl', 'csv' or 'binary' (needs a binary file).
+        """
+        from sd_sdk_python.sd_sdk_dump import WRITERS
         if file_obj is None:
             file_obj = sys.stdout
 
-        if self.product is not None:
-            # Dump all system parameters
-            for p in self.product.SystemMemory.Parameters:
-                file_obj.write("%s=%s\n" % (p.Id, self.get_parameter_value(self.sd.kSystemNvmMemory, p.Id)))
-            # Dump all parameters in all memories
-            i = 0
-            for m in self.product.Memories:
-                for p in m.Parameters:
-                    file_obj.write("%s=%s\n" % (p.Id, self.get_parameter_value(i, p.Id)))
-                i += 1
+        WRITERS[format](self.iter_parameters(memories), file_obj)
+
+    def read_field_parameters(self, field, memory_number):
+        """
+        Returns the parameter values of a PackedField in a memory, reading an
+        NVM memory from the device once (as the EEPROM getters do).
+        """
+        if memory_number != self.sd.kActiveMemory and memory_number != self.sd.kSystemActiveMemory:
+            self._read_through_shadow(memory_number)
+        get_parameter_value = self.get_parameter_value
+        return [get_parameter_value(memory_number, name) for name in field.names]
+
+    def read_field(self, field, memory_number):
+        """Returns the value of a PackedField (e.g. DEVICE_NAME) in a memory"""
+        return field.decode(self.read_field_parameters(field, memory_number))
+
+    def write_field(self, field, memory_number, value):
+        """Writes a PackedField value (a str, or bytes without encoding) with one WriteParameters"""
+        return self.set_many({memory_number: field.values(value)})
 
     @staticmethod
     def parameters_to_device_name(list_of_parameters):
-        assert len(list_of_parameters) <= 8
-        name = b''
-        for param in list_of_parameters:
-            name += param.to_bytes(3, 'big')
-        return name.decode('utf-8').strip('\x00')
+        return DEVICE_NAME.decode(list_of_parameters)
 
     @staticmethod
     def device_name_to_parameters(name):
-        params = [0]*8
-        encoded_bytes = []
-        for character in name:
-            enc = character.encode('utf-8')
-            # Clip length to 22 bytes (maximum allowable name length)
-            if (len(encoded_bytes) + len(enc)) > 22:
-                break
-            encoded_bytes += [int(w) for w in enc]
+        # Clipped to 22 bytes (maximum allowable name length) on a character boundary
+        return DEVICE_NAME.encode(name)
+
+class ParameterBatch:
+    """
+    Parameter changes staged against an Ezairo. Nothing is sent to the
+    device until commit(), which applies the staged values and writes each
+    touched memory once. Used as a context manager, the batch commits when
+    the block exits normally and is discarded if it raises.
+    """
+    def __init__(self, device):
+        self.device = device
+        # {memory number: {param_name: value}}, in the order first touched
+        self.staged = {}
+
+    def set(self, memory_number, param_name, value):
+        self.staged.setdefault(memory_number, {})[param_name] = value
+
+    def update(self, memory_number, values):
+        self.staged.setdefault(memory_number, {}).update(values)
 
-        # Pack encoded_bytes into 24-bit parameters
-        for i in range(0, len(encoded_bytes), 3):
-            value = 0
-            substr = encoded_bytes[i:i+3]
-            for j, char in enumerate(substr):
-                value |= (char << (16 - j*8))
-            params[i // 3] = value
-        return params
+    def set_profile_parameter_in_RAM(self, param_name, value):
+        self.set(self.device.sd.kActiveMemory, param_name, value)
 
-def wait_for_async(_async, timeout_seconds=1.0, sleep_time_seconds=0.01):
-    """Waits for an AsyncResult to finish"""
-    while not _async.IsFinished and timeout > 0:
-        time.sleep(sleep_time_seconds)
-        timeout -= sleep_time_seconds
+    def set_global_parameter_in_RAM(self, param_name, value):
+        self.set(self.device.sd.kSystemActiveMemory, param_name, value)
+
+    def set_profile_parameter_in_EEPROM(self, param_name, value, nvm_memory):
+        self.device.check_nvm_memory(nvm_memory)
+        self.set(nvm_memory, param_name, value)
+
+    def set_global_parameter_in_EEPROM(self, param_name, value):
+        self.set(self.device.sd.kSystemNvmMemory, param_name, value)
+
+    def set_field(self, field, memory_number, value):
+        self.update(memory_number, field.values(value))
+
+    def discard(self,):
+        self.staged = {}
 
-    if timeout <= 0:
+    def commit(self,):
+        """Applies and writes all staged changes. Returns the list of memories written."""
+        written = []
+        if self.device.product is not None:
+            for memory_number, values in self.staged.items():
+                for param_name, value in values.items():
+                    self.device.set_parameter_value(memory_number, param_name, value)
+                self.device._write_parameters(memory_number)
+                written.append(memory_number)
+        self.staged = {}
+        return written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+def wait_for_async(_async, timeout_seconds=1.0, sleep_time_seconds=0.01):
+    """
+    Waits for an AsyncResult to finish and returns its result. Completion is
+    polled adaptively, never sleeping longer than sleep_time_seconds at a
+    time (see SDKFuture for progress reporting, cancellation and waiting on
+    many operations at once).
+    """
+    from sd_sdk_python.sd_sdk_async import SDKFuture
+    future = _async if isinstance(_async, SDKFuture) else SDKFuture(_async)
+    if not future.wait(timeout_seconds, max_poll_interval=sleep_time_seconds):
         raise RuntimeError("Error: Timed out waiting for async!")
 
-    return _async.GetResult()
+    return future.result()
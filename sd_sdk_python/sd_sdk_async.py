@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+"""
+Future-like wrappers for the SDK's AsyncResult objects (returned by the
+Begin* calls, e.g. BeginLoadParamFile or BeginScanForWirelessDevices).
+"""
+# Copyright (c) 2022 Semiconductor Components Industries, LLC
+# (d/b/a ON Semiconductor). All Rights Reserved.
+#
+# This code is the property of ON Semiconductor and may not be redistributed
+# in any form without prior written permission from ON Semiconductor. The
+# terms of use and warranty for this code are covered by contractual
+# agreements between ON Semiconductor and the licensee.
+# ----------------------------------------------------------------------------
+# $Revision:  $
+# $Date:  $
+# ----------------------------------------------------------------------------
+import time
+import logging
+from concurrent.futures import CancelledError
+
+logger = logging.getLogger("sd_sdk_async")
+
+# AsyncResult has no completion callback, so completion is detected by
+# polling IsFinished. Polling starts fast (low latency for short operations)
+# and backs off towards MAX_POLL_INTERVAL while nothing changes; any progress
+# change brings the interval back down.
+MIN_POLL_INTERVAL = 0.0005
+MAX_POLL_INTERVAL = 0.05
+
+
+class _Backoff:
+    def __init__(self, maximum=MAX_POLL_INTERVAL):
+        self.maximum = max(maximum, MIN_POLL_INTERVAL)
+        self.interval = MIN_POLL_INTERVAL
+
+    def reset(self):
+        self.interval = MIN_POLL_INTERVAL
+
+    def sleep(self, deadline=None):
+        interval = self.interval
+        if deadline is not None:
+            interval = min(interval, max(deadline - time.monotonic(), 0.0))
+        time.sleep(interval)
+        self.interval = min(self.interval * 2, self.maximum)
+
+
+class SDKFuture:
+    """
+    Wraps an SDK AsyncResult with a concurrent.futures-like interface.
+
+    on_progress     Optional callable called with (future, progress value)
+                    whenever the progress reported by the SDK changes while
+                    the future is being waited on.
+    """
+    def __init__(self, async_result, name=None, on_progress=None):
+        self._async = async_result
+        self.name = name
+        self.on_progress = on_progress
+        self._finished = False
+        self._cancelled = False
+        self._has_result = False
+        self._result = None
+        self._exception = None
+        self._progress = None
+        self._callbacks = []
+        self.started = time.monotonic()
+        self.finished_at = None
+
+    def __repr__(self):
+        state = 'cancelled' if self._cancelled else 'finished' if self._finished else 'pending'
+        return f"<SDKFuture {self.name or ''} {state}>"
+
+    def progress(self):
+        """Returns the progress value reported by the SDK for this operation"""
+        return self._async.GetProgressValue()
+
+    def _poll(self):
+        # Returns True once the operation has finished (or been cancelled)
+        # and records progress changes on the way
+        if self._finished or self._cancelled:
+            return True
+        if self.on_progress is not None:
+            progress = self.progress()
+            if progress != self._progress:
+                self._progress = progress
+                self.on_progress(self, progress)
+        if self._async.IsFinished:
+            self._finish()
+            return True
+        return False
+
+    def _finish(self):
+        self._finished = True
+        self.finished_at = time.monotonic()
+        self._run_callbacks()
+
+    def _run_callbacks(self):
+        callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception:
+                logger.exception(f"Exception in done callback of {self!r}")
+
+    def done(self):
+        return self._poll()
+
+    def running(self):
+        return not self._poll()
+
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        """
+        Stops waiting for the operation. The SDK is asked to cancel it when
+        its AsyncResult supports that; otherwise it runs to completion in the
+        background and its result is discarded.
+        """
+        if self._finished:
+            return False
+        cancel = getattr(self._async, 'Cancel', None)
+        if callable(cancel):
+            cancel()
+        self._cancelled = True
+        self._run_callbacks()
+        return True
+
+    def add_done_callback(self, fn):
+        """Calls fn(future) once the future is seen to finish (immediately if it already has)"""
+        if self._finished or self._cancelled:
+            fn(self)
+        else:
+            self._callbacks.append(fn)
+
+    def wait(self, timeout=None, max_poll_interval=MAX_POLL_INTERVAL):
+        """Waits for the operation to finish. Returns False if timeout (seconds) expired first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        backoff = _Backoff(max_poll_interval)
+        progress = self._progress
+        while not self._poll():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if self._progress != progress:
+                progress = self._progress
+                backoff.reset()
+            backoff.sleep(deadline)
+        return True
+
+    def result(self, timeout=None):
+        """Returns the result of the operation, raising TimeoutError or CancelledError"""
+        if not self.wait(timeout):
+            raise TimeoutError(f"Timed out waiting for {self!r}")
+        if self._cancelled:
+            raise CancelledError()
+        if not self._has_result:
+            try:
+                self._result = self._async.GetResult()
+            except Exception as e:
+                self._exception = e
+            self._has_result = True
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self, timeout=None):
+        """Returns the exception raised by the operation (or None)"""
+        try:
+            self.result(timeout)
+        except (TimeoutError, CancelledError):
+            raise
+        except Exception as e:
+            return e
+        return None
+
+
+def as_completed(futures, timeout=None, max_poll_interval=MAX_POLL_INTERVAL):
+    """
+    Yields the futures as they finish, polling all of them from the calling
+    thread. Raises TimeoutError if they have not all finished within timeout
+    seconds.
+    """
+    pending = list(futures)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    backoff = _Backoff(max_poll_interval)
+    while pending:
+        still_pending = []
+        for future in pending:
+            if future._poll():
+                yield future
+            else:
+                still_pending.append(future)
+        if len(still_pending) != len(pending):
+            backoff.reset()
+        pending = still_pending
+        if not pending:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"{len(pending)} of the operations did not finish in time")
+        backoff.sleep(deadline)
+
+
+def wait_all(futures, timeout=None, max_poll_interval=MAX_POLL_INTERVAL):
+    """Waits for all futures and returns their results in the order given"""
+    futures = list(futures)
+    for _ in as_completed(futures, timeout, max_poll_interval):
+        pass
+    return [f.result() for f in futures]
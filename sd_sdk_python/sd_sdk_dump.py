@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+"""
+Streaming writers (and a reader) for parameter dumps produced by
+Ezairo.iter_parameters().
+"""
+# Copyright (c) 2022 Semiconductor Components Industries, LLC
+# (d/b/a ON Semiconductor). All Rights Reserved.
+#
+# This code is the property of ON Semiconductor and may not be redistributed
+# in any form without prior written permission from ON Semiconductor. The
+# terms of use and warranty for this code are covered by contractual
+# agreements between ON Semiconductor and the licensee.
+# ----------------------------------------------------------------------------
+# $Revision:  $
+# $Date:  $
+# ----------------------------------------------------------------------------
+import csv
+import io
+import json
+import struct
+from collections import namedtuple
+
+# One parameter value read from a memory ('memory' is the memory number,
+# kSystemNvmMemory for system parameters)
+ParameterRecord = namedtuple('ParameterRecord', ['memory', 'id', 'value'])
+
+# Number of records formatted before each write to the file object
+BUFFER_RECORDS = 512
+
+_BINARY_MAGIC = b'SDPD'
+_BINARY_VERSION = 1
+# Record kinds in the binary format
+_ID_DEFINITION = 0xFF
+_HEADER = struct.Struct('>4sB')
+_ID = struct.Struct('>BH')
+_RECORD = struct.Struct('>BHc')
+_VALUES = {b'i': struct.Struct('>i'), b'?': struct.Struct('>?'), b'd': struct.Struct('>d')}
+
+
+def _chunks(records, size=BUFFER_RECORDS):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_text(records, file_obj):
+    """Writes 'id=value' lines (the classic dump_parameters format)"""
+    for chunk in _chunks(records):
+        file_obj.write(''.join("%s=%s\n" % (r.id, r.value) for r in chunk))
+
+
+def write_jsonl(records, file_obj):
+    """Writes one JSON object per line: {"memory": ..., "id": ..., "value": ...}"""
+    dumps = json.JSONEncoder(separators=(',', ':')).encode
+    for chunk in _chunks(records):
+        file_obj.write(''.join(dumps(r._asdict()) + '\n' for r in chunk))
+
+
+def write_csv(records, file_obj):
+    """Writes a 'memory,id,value' header followed by one row per record"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(ParameterRecord._fields)
+    for chunk in _chunks(records):
+        writer.writerows(chunk)
+        file_obj.write(buffer.getvalue())
+        buffer.seek(0)
+        buffer.truncate()
+    file_obj.write(buffer.getvalue())
+
+
+def write_binary(records, file_obj):
+    """
+    Writes a compact binary dump to a binary file object. Each parameter id is
+    stored once (the first time it is seen) and later records refer to it by
+    number. Use read_binary() to read it back.
+    """
+    ids = {}
+    file_obj.write(_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION))
+    for chunk in _chunks(records):
+        out = bytearray()
+        for memory, param_id, value in chunk:
+            ref = ids.get(param_id)
+            if ref is None:
+                ref = ids[param_id] = len(ids)
+                encoded = param_id.encode('utf-8')
+                out += _ID.pack(_ID_DEFINITION, len(encoded))
+                out += encoded
+            if isinstance(value, bool):
+                kind = b'?'
+            elif isinstance(value, float):
+                kind = b'd'
+            else:
+                kind = b'i'
+            out += _RECORD.pack(memory, ref, kind)
+            out += _VALUES[kind].pack(value)
+        file_obj.write(out)
+
+
+def read_binary(file_obj):
+    """Yields the ParameterRecords of a dump written by write_binary()"""
+    data = file_obj.read()
+    magic, version = _HEADER.unpack_from(data, 0)
+    if magic != _BINARY_MAGIC or version != _BINARY_VERSION:
+        raise ValueError("Not a binary parameter dump (or an unsupported version)")
+    ids = []
+    offset = _HEADER.size
+    while offset < len(data):
+        if data[offset] == _ID_DEFINITION:
+            _, length = _ID.unpack_from(data, offset)
+            offset += _ID.size
+            ids.append(data[offset:offset + length].decode('utf-8'))
+            offset += length
+            continue
+        memory, ref, kind = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        value_struct = _VALUES[kind]
+        value, = value_struct.unpack_from(data, offset)
+        offset += value_struct.size
+        yield ParameterRecord(memory, ids[ref], value)
+
+
+WRITERS = {
+    'text': write_text,
+    'jsonl': write_jsonl,
+    'csv': write_csv,
+    'binary': write_binary,
+}
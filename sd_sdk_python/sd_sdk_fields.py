@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+"""
+Codecs for strings and blobs packed into a run of numbered parameters
+(e.g. the device name in X_RF_DeviceName0..7).
+"""
+# Copyright (c) 2022 Semiconductor Components Industries, LLC
+# (d/b/a ON Semiconductor). All Rights Reserved.
+#
+# This code is the property of ON Semiconductor and may not be redistributed
+# in any form without prior written permission from ON Semiconductor. The
+# terms of use and warranty for this code are covered by contractual
+# agreements between ON Semiconductor and the licensee.
+# ----------------------------------------------------------------------------
+# $Revision:  $
+# $Date:  $
+# ----------------------------------------------------------------------------
+import struct
+
+
+class PackedField(object):
+    """
+    A value stored big-endian, 'word_bytes' bytes per parameter, across the
+    'count' parameters named prefix0, prefix1, ...:
+
+        DEVICE_NAME = PackedField('X_RF_DeviceName', count=8, word_bytes=3, max_bytes=22)
+        DEVICE_NAME.encode('Hörgerät')      # [0x48c3b6, 0x726765, ...]
+        DEVICE_NAME.decode(parameters)      # 'Hörgerät'
+
+    With an 'encoding', values are strings: encoding clips to at most
+    'max_bytes' bytes without splitting a character, and decoding strips
+    NUL padding. Without one, values are bytes and are clipped at max_bytes.
+    Unused parameters are 0.
+
+    Encoding packs the whole field at once through a 4-byte-per-word buffer
+    and a single struct call.
+    """
+    __slots__ = ('prefix', 'count', 'word_bytes', 'encoding', 'max_bytes', 'names', '_struct', '_pad')
+
+    def __init__(self, prefix, count=8, word_bytes=3, encoding='utf-8', max_bytes=None):
+        if not 1 <= word_bytes <= 4:
+            raise ValueError("word_bytes must be between 1 and 4")
+        self.prefix = prefix
+        self.count = count
+        self.word_bytes = word_bytes
+        self.encoding = encoding
+        self.max_bytes = count * word_bytes if max_bytes is None else min(max_bytes, count * word_bytes)
+        self.names = tuple(f"{prefix}{i}" for i in range(count))
+        self._struct = struct.Struct(f'>{count}I')
+        # Leading bytes of each 4-byte word that are not part of the parameter
+        self._pad = 4 - word_bytes
+
+    def __repr__(self):
+        return (f"PackedField({self.prefix!r}, count={self.count}, word_bytes={self.word_bytes}, "
+                f"encoding={self.encoding!r}, max_bytes={self.max_bytes})")
+
+    def _clip(self, value):
+        if self.encoding is None:
+            return bytes(value[:self.max_bytes])
+        data = value.encode(self.encoding)
+        if len(data) > self.max_bytes:
+            # Drop any character cut short by the limit
+            data = data[:self.max_bytes].decode(self.encoding, errors='ignore').encode(self.encoding)
+        return data
+
+    def _pack(self, data, words):
+        # Spreads data over the low word_bytes bytes of each 4-byte word
+        for j in range(self.word_bytes):
+            column = data[j::self.word_bytes]
+            words[self._pad + j:self._pad + j + 4 * len(column):4] = column
+
+    def encode(self, value):
+        """Returns the list of 'count' parameter values holding value"""
+        data = self._clip(value)
+        words = bytearray(4 * self.count)
+        self._pack(data, words)
+        return list(self._struct.unpack(words))
+
+    def encode_many(self, values):
+        """Encodes many values (e.g. names for a production run), reusing one buffer"""
+        zeros = bytes(4 * self.count)
+        words = bytearray(zeros)
+        unpack = self._struct.unpack
+        encoded = []
+        for value in values:
+            words[:] = zeros
+            self._pack(self._clip(value), words)
+            encoded.append(list(unpack(words)))
+        return encoded
+
+    def decode(self, parameters):
+        """Returns the value held by a sequence of (up to 'count') parameter values"""
+        if len(parameters) > self.count:
+            raise ValueError(f"{self.prefix} has {self.count} parameters, got {len(parameters)}")
+        word_bytes = self.word_bytes
+        data = b''.join([p.to_bytes(word_bytes, 'big') for p in parameters])
+        if self.encoding is None:
+            return data
+        return data.decode(self.encoding).strip('\x00')
+
+    def values(self, value):
+        """Returns {parameter name: value} for writing value (see Ezairo.write_field)"""
+        return dict(zip(self.names, self.encode(value)))
+
+
+# The device names advertised over the radio
+DEVICE_NAME = PackedField('X_RF_DeviceName', count=8, word_bytes=3, max_bytes=22)
+GAP_DEVICE_NAME = PackedField('X_RF_GAPDeviceName', count=8, word_bytes=3, max_bytes=22)
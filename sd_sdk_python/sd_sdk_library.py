@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+"""
+A cache of loaded product libraries, keyed by path and reloaded only when
+the file changes.
+"""
+# Copyright (c) 2022 Semiconductor Components Industries, LLC
+# (d/b/a ON Semiconductor). All Rights Reserved.
+#
+# This code is the property of ON Semiconductor and may not be redistributed
+# in any form without prior written permission from ON Semiconductor. The
+# terms of use and warranty for this code are covered by contractual
+# agreements between ON Semiconductor and the licensee.
+# ----------------------------------------------------------------------------
+# $Revision:  $
+# $Date:  $
+# ----------------------------------------------------------------------------
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from sd_sdk_python import get_product_manager
+
+logger = logging.getLogger("sd_sdk_library")
+
+
+@dataclass
+class LibraryMetrics:
+    # Number of times the file was loaded with LoadLibraryFromFile
+    loads: int = 0
+    # Number of times the already loaded library was returned
+    hits: int = 0
+    # Seconds spent in LoadLibraryFromFile, in total and for the last load
+    load_seconds: float = 0.0
+    last_load_seconds: float = 0.0
+
+
+class _Entry(object):
+    __slots__ = ('lock', 'stamp', 'library', 'metrics')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stamp = None
+        self.library = None
+        self.metrics = LibraryMetrics()
+
+
+class LibraryCache(object):
+    """
+    Product libraries loaded with LoadLibraryFromFile, keyed by absolute
+    path. load() returns the library already loaded from a path as long as
+    the file's modification time and size are unchanged, and loads it
+    again otherwise. Concurrent loads of the same path wait for one another
+    rather than loading twice.
+
+    Products hold the state of the device they are used with, so
+    create_product() creates a new one from the cached library every time.
+    """
+    def __init__(self, product_manager=None):
+        self._product_manager = product_manager
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def product_manager(self):
+        return get_product_manager() if self._product_manager is None else self._product_manager
+
+    def _entry(self, path):
+        entry = self._entries.get(path)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.setdefault(path, _Entry())
+        return entry
+
+    def load(self, path):
+        """Returns the library at path, loading it only if not loaded already or changed since"""
+        path = os.path.abspath(os.fspath(path))
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        entry = self._entry(path)
+        with entry.lock:
+            if entry.library is not None and entry.stamp == stamp:
+                entry.metrics.hits += 1
+                return entry.library
+            start = time.perf_counter()
+            library = self.product_manager.LoadLibraryFromFile(path)
+            seconds = time.perf_counter() - start
+            entry.library, entry.stamp = library, stamp
+            entry.metrics.loads += 1
+            entry.metrics.load_seconds += seconds
+            entry.metrics.last_load_seconds = seconds
+            logger.debug(f"Loaded {path} in {seconds:.3f}s")
+            return library
+
+    def create_product(self, path, index=0):
+        """Creates a product from the (cached) library at path"""
+        return self.load(path).Products[index].CreateProduct()
+
+    def prewarm(self, paths, background=True):
+        """
+        Loads libraries ahead of their first use. With background, loads them
+        in a daemon thread and returns it (join() it to wait); otherwise
+        loads them before returning. Failures are logged, not raised.
+        """
+        paths = list(paths)
+
+        def _prewarm():
+            for path in paths:
+                try:
+                    self.load(path)
+                except Exception as e:
+                    logger.warning(f"Failed to prewarm {path}: {e!r}")
+
+        if not background:
+            _prewarm()
+            return None
+        thread = threading.Thread(target=_prewarm, name="LibraryPrewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def metrics(self) -> dict:
+        """Returns {path: LibraryMetrics} for every library loaded so far"""
+        # Another thread may add an entry while this one iterates
+        with self._lock:
+            entries = list(self._entries.items())
+        return {path: LibraryMetrics(**vars(entry.metrics)) for path, entry in entries}
+
+    def invalidate(self, path=None):
+        """Forgets the library loaded from path (or every library)"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(os.fspath(path)), None)
+
+
+# Libraries loaded by this process
+library_cache = LibraryCache()
+
+
+def load_library(path):
+    """Returns the product library at path, loaded once per version of the file"""
+    return library_cache.load(path)
+
+
+def prewarm_libraries(paths, background=True):
+    """Loads product libraries ahead of use (see LibraryCache.prewarm)"""
+    return library_cache.prewarm(paths, background)
+
+
+def get_library_metrics():
+    """Returns {path: LibraryMetrics} for the libraries loaded through load_library"""
+    return library_cache.metrics()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+"""
+Opt-in latency metrics for calls into the Sound Designer SDK.
+"""
+# Copyright (c) 2022 Semiconductor Components Industries, LLC
+# (d/b/a ON Semiconductor). All Rights Reserved.
+#
+# This code is the property of ON Semiconductor and may not be redistributed
+# in any form without prior written permission from ON Semiconductor. The
+# terms of use and warranty for this code are covered by contractual
+# agreements between ON Semiconductor and the licensee.
+# ----------------------------------------------------------------------------
+# $Revision:  $
+# $Date:  $
+# ----------------------------------------------------------------------------
+import bisect
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Whether timed_call records metrics (see enable())
+_enabled = False
+# Called as _tracer(operation, start, end, memory, device, error) for every
+# timed call while tracing (see sd_sdk_trace)
+_tracer = None
+# Checked by timed_call before doing anything else
+_active = False
+
+
+class Histogram(object):
+    """Latency histogram (plus call, byte and error counts) of one series"""
+    __slots__ = ('buckets', 'count', 'sum', 'min', 'max', 'bytes', 'errors')
+
+    def __init__(self):
+        # Non-cumulative counts per BUCKETS entry, then the overflow bucket
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.bytes = 0
+        self.errors = 0
+
+    def observe(self, seconds, nbytes=None, error=False):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = seconds if self.min is None or seconds < self.min else self.min
+        self.max = seconds if self.max is None or seconds > self.max else self.max
+        if nbytes:
+            self.bytes += nbytes
+        if error:
+            self.errors += 1
+
+    def merge(self, other):
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self.bytes += other.bytes
+        self.errors += other.errors
+
+    def quantile(self, q):
+        """Estimates a quantile as the upper bound of the bucket holding it"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS + (self.max,), self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self,) -> dict:
+        return {'count': self.count, 'sum': self.sum, 'min': self.min, 'max': self.max,
+                'mean': self.sum / self.count if self.count else None,
+                'p50': self.quantile(0.5), 'p95': self.quantile(0.95),
+                'bytes': self.bytes, 'errors': self.errors,
+                'buckets': dict(zip([str(b) for b in BUCKETS] + ['+Inf'], self.buckets))}
+
+
+_LABELS = ('operation', 'memory', 'device')
+
+
+class MetricsRegistry(object):
+    """Histograms keyed by (operation, memory, device)"""
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, operation, seconds, memory=None, device=None, nbytes=None, error=False):
+        key = (operation, memory, device)
+        with self._lock:
+            histogram = self._series.get(key)
+            if histogram is None:
+                histogram = self._series[key] = Histogram()
+            histogram.observe(seconds, nbytes, error)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def _copy(self):
+        with self._lock:
+            copies = {}
+            for key, histogram in self._series.items():
+                copy = copies[key] = Histogram()
+                copy.merge(histogram)
+            return copies
+
+    def totals(self, by=('operation',)) -> dict:
+        """Returns {label values: Histogram} merged over the labels not in 'by'"""
+        indexes = [_LABELS.index(label) for label in by]
+        totals = {}
+        for key, histogram in self._copy().items():
+            group = tuple(key[i] for i in indexes)
+            totals.setdefault(group, Histogram()).merge(histogram)
+        return totals
+
+    def snapshot(self,) -> dict:
+        """Returns every series and the per-operation totals as plain data"""
+        return {
+            'series': [dict(zip(_LABELS, key), **histogram.to_dict())
+                       for key, histogram in sorted(self._copy().items(), key=lambda kv: str(kv[0]))],
+            'operations': {key[0]: histogram.to_dict() for key, histogram in self.totals().items()},
+        }
+
+    def to_json(self, indent=None):
+        import json
+        return json.dumps(self.snapshot(), indent=indent, default=str)
+
+    def to_prometheus(self, prefix='sd_sdk_call'):
+        """Returns the series in the Prometheus text exposition format"""
+        def labels(key, extra=''):
+            parts = [f'{name}="{_escape(value)}"' for name, value in zip(_LABELS, key) if value is not None]
+            if extra:
+                parts.append(extra)
+            return '{' + ','.join(parts) + '}'
+
+        bucket_label = 'le="%s"'
+        series = sorted(self._copy().items(), key=lambda kv: str(kv[0]))
+        lines = [f"# HELP {prefix}_seconds Latency of Sound Designer SDK calls",
+                 f"# TYPE {prefix}_seconds histogram"]
+        for key, histogram in series:
+            cumulative = 0
+            for bound, n in zip(BUCKETS, histogram.buckets):
+                cumulative += n
+                lines.append(f'{prefix}_seconds_bucket{labels(key, bucket_label % bound)} {cumulative}')
+            lines.append(f'{prefix}_seconds_bucket{labels(key, bucket_label % "+Inf")} {histogram.count}')
+            lines.append(f'{prefix}_seconds_sum{labels(key)} {histogram.sum}')
+            lines.append(f'{prefix}_seconds_count{labels(key)} {histogram.count}')
+        lines += [f"# HELP {prefix}_bytes_total Bytes transferred by Sound Designer SDK calls (where known)",
+                  f"# TYPE {prefix}_bytes_total counter"]
+        lines += [f'{prefix}_bytes_total{labels(key)} {h.bytes}' for key, h in series if h.bytes]
+        lines += [f"# HELP {prefix}_errors_total Sound Designer SDK calls that raised",
+                  f"# TYPE {prefix}_errors_total counter"]
+        lines += [f'{prefix}_errors_total{labels(key)} {h.errors}' for key, h in series]
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Calls made by this process
+registry = MetricsRegistry()
+
+
+def _update_active():
+    global _active
+    _active = _enabled or _tracer is not None
+
+
+def set_tracer(tracer):
+    """Sets (or with None, clears) the function timed_call reports every call to"""
+    global _tracer
+    _tracer = tracer
+    _update_active()
+
+
+def enable():
+    """Starts recording SDK calls made through timed_call"""
+    global _enabled
+    _enabled = True
+    _update_active()
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    _update_active()
+
+
+def is_enabled():
+    return _enabled
+
+
+def timed_call(operation, fn, *args, memory=None, device=None, nbytes=None):
+    """
+    Returns fn(*args), recording its latency under (operation, memory,
+    device) when metrics are enabled (and reporting it to the tracer when
+    tracing). Otherwise this costs one global lookup on top of the call.
+    'device' is a device ID or an object with a 'serial_id' (e.g.
+    DeviceInfo), only looked at when enabled.
+    """
+    if not _active:
+        return fn(*args)
+    device = getattr(device, 'serial_id', device)
+    start = time.perf_counter()
+    error = True
+    try:
+        result = fn(*args)
+        error = False
+        return result
+    finally:
+        end = time.perf_counter()
+        if _enabled:
+            registry.observe(operation, end - start, memory, device, nbytes, error)
+        tracer = _tracer
+        if tracer is not None:
+            tracer(operation, start, end, memory, device, error)
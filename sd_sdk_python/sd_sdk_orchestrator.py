@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+"""
+Connects to, and runs operations on, many wireless devices concurrently.
+"""
+# Copyright (c) 2022 Semiconductor Components Industries, LLC
+# (d/b/a ON Semiconductor). All Rights Reserved.
+#
+# This code is the property of ON Semiconductor and may not be redistributed
+# in any form without prior written permission from ON Semiconductor. The
+# terms of use and warranty for this code are covered by contractual
+# agreements between ON Semiconductor and the licensee.
+# ----------------------------------------------------------------------------
+# $Revision:  $
+# $Date:  $
+# ----------------------------------------------------------------------------
+import collections
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from sd_sdk_python.sd_sdk_wireless import connect_to_device
+
+logger = logging.getLogger("sd_sdk_orchestrator")
+
+
+@dataclass
+class DeviceResult:
+    device_id: str
+    programmer: object = None
+    # The value returned by the operation (if it succeeded)
+    result: object = None
+    # The exception raised while connecting or running the operation
+    error: BaseException = None
+    connect_seconds: float = 0.0
+    operation_seconds: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def total_seconds(self):
+        return self.connect_seconds + self.operation_seconds
+
+
+@dataclass
+class OrchestratorReport:
+    results: list = field(default_factory=list)
+    wall_seconds: float = 0.0
+
+    @property
+    def serial_seconds_estimate(self):
+        """
+        An estimate of the time the same work would take one device at a
+        time: the sum of the per-device times, measured while running
+        concurrently (so including any slowdown from sharing a programmer).
+        """
+        return sum(r.total_seconds for r in self.results)
+
+    @property
+    def speedup_estimate(self):
+        return self.serial_seconds_estimate / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def succeeded(self):
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    def to_dict(self,) -> dict:
+        return {
+            'wall_seconds': self.wall_seconds,
+            'serial_seconds_estimate': self.serial_seconds_estimate,
+            'speedup_estimate': self.speedup_estimate,
+            'devices': [{'device_id': r.device_id,
+                         'programmer': r.programmer,
+                         'ok': r.ok,
+                         'error': None if r.ok else repr(r.error),
+                         'connect_seconds': r.connect_seconds,
+                         'operation_seconds': r.operation_seconds} for r in self.results],
+        }
+
+
+class FittingOrchestrator(object):
+    """
+    Connects to a batch of wireless devices and runs an operation on each of
+    them concurrently, e.g. both sides of a binaural pair:
+
+        orchestrator = FittingOrchestrator(sd.kRSL10, max_concurrency=4, per_programmer=2)
+        report = orchestrator.run(['60:C0:BF:00:00:01', '60:C0:BF:00:00:02'], fit)
+        print(report.wall_seconds, report.serial_seconds_estimate)
+
+    wireless_programmer_type    One of kRSL10 or kNoahlinkWireless
+
+    max_concurrency             Maximum number of devices handled at once
+
+    per_programmer              Maximum number of devices handled at once through the same
+                                programmer (None for no limit beyond max_concurrency).
+                                Devices are given as (device_id, programmer) pairs to say
+                                which programmer they use; plain device IDs share one. A
+                                device is only handed to a worker once its programmer has
+                                room, so devices on a busy programmer never hold up those
+                                on an idle one.
+
+    connect                     Callable(device_id) returning a connected adaptor (default:
+                                connect_to_device with connect_timeout)
+
+    release                     Callable(adaptor) called once the operation is done (default:
+                                adaptor.close())
+
+    To keep the connections open for the next batch, pass the acquire and
+    release methods of a WirelessConnectionPool as connect and release.
+    """
+    def __init__(self, wireless_programmer_type, max_concurrency=4, per_programmer=None,
+                 connect=None, release=None, connect_timeout=10.0):
+        if per_programmer is not None and per_programmer < 1:
+            # No device could ever be scheduled
+            raise ValueError("per_programmer must be at least 1")
+        self.wireless_programmer_type = wireless_programmer_type
+        self.max_concurrency = max_concurrency
+        self.per_programmer = per_programmer
+        self.connect_timeout = connect_timeout
+        self.connect = connect if connect is not None else self._connect
+        self.release = release if release is not None else (lambda adaptor: adaptor.close())
+
+    def _connect(self, device_id):
+        return connect_to_device(device_id, self.wireless_programmer_type, timeout=self.connect_timeout)
+
+    def _run_one(self, device_id, programmer, operation):
+        device_result = DeviceResult(device_id, programmer)
+        adaptor = None
+        try:
+            start = time.perf_counter()
+            adaptor = self.connect(device_id)
+            device_result.connect_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            try:
+                device_result.result = operation(adaptor)
+            finally:
+                # Failed operations count towards the time spent too
+                device_result.operation_seconds = time.perf_counter() - start
+        except Exception as e:
+            logger.error(f"Device {device_id}: {e!r}")
+            device_result.error = e
+        finally:
+            try:
+                if adaptor is not None:
+                    self.release(adaptor)
+            except Exception as e:
+                logger.error(f"Device {device_id}: failed to release: {e!r}")
+                if device_result.error is None:
+                    device_result.error = e
+        return device_result
+
+    def run(self, devices, operation):
+        """
+        Runs operation(adaptor) on every device and returns an
+        OrchestratorReport with the per-device results (in the order given),
+        errors and timings. Errors on one device do not stop the others.
+        """
+        jobs = [d if isinstance(d, tuple) else (d, None) for d in devices]
+        max_concurrency = max(1, self.max_concurrency)
+        pending = list(enumerate(jobs))
+        results = [None] * len(jobs)
+        # {future: (index, programmer)} and the number running per programmer
+        running = {}
+        busy = collections.Counter()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="FittingOrchestrator") as executor:
+            while pending or running:
+                # Start (in the order given) the devices whose programmer has room
+                waiting = []
+                for index, (device_id, programmer) in pending:
+                    if len(running) >= max_concurrency or \
+                            (self.per_programmer is not None and busy[programmer] >= self.per_programmer):
+                        waiting.append((index, (device_id, programmer)))
+                        continue
+                    busy[programmer] += 1
+                    future = executor.submit(self._run_one, device_id, programmer, operation)
+                    running[future] = (index, programmer)
+                pending = waiting
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, programmer = running.pop(future)
+                    busy[programmer] -= 1
+                    results[index] = future.result()
+        report = OrchestratorReport(results, time.perf_counter() - start)
+        logger.debug(f"Handled {len(results)} devices in {report.wall_seconds:.2f}s "
+                     f"(estimated serial time {report.serial_seconds_estimate:.2f}s)")
+        return report
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+"""
+A cache of the parameter state that loading a param file produces, so that
+loading the same file again only needs to write what differs.
+"""
+# Copyright (c) 2022 Semiconductor Components Industries, LLC
+# (d/b/a ON Semiconductor). All Rights Reserved.
+#
+# This code is the property of ON Semiconductor and may not be redistributed
+# in any form without prior written permission from ON Semiconductor. The
+# terms of use and warranty for this code are covered by contractual
+# agreements between ON Semiconductor and the licensee.
+# ----------------------------------------------------------------------------
+# $Revision:  $
+# $Date:  $
+# ----------------------------------------------------------------------------
+import collections
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+
+_READ_CHUNK = 1 << 16
+
+
+def file_digest(path):
+    """Returns the BLAKE2b digest of the contents of a file"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_READ_CHUNK), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+@dataclass
+class ParamFileCacheStats:
+    hits: int = 0
+    misses: int = 0
+
+
+class ParamFileCache(object):
+    """
+    ParameterSnapshots of the state left by loading a param file, keyed by
+    the file's content hash and the product definition (LibraryId,
+    ProductId) it was loaded into. Keeps at most 'max_entries' snapshots,
+    dropping the least recently used.
+
+    The content hash of a path is remembered while the file's modification
+    time and size are unchanged, so a file is hashed once per edit rather
+    than once per load.
+    """
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.stats = ParamFileCacheStats()
+        self._snapshots = collections.OrderedDict()
+        # {path: ((mtime_ns, size), digest)}
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def digest(self, path):
+        path = os.fspath(path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        known = self._digests.get(path)
+        if known is not None and known[0] == stamp:
+            return known[1]
+        digest = file_digest(path)
+        with self._lock:
+            self._digests[path] = (stamp, digest)
+        return digest
+
+    @staticmethod
+    def key(digest, product):
+        definition = product.Definition
+        return digest, definition.LibraryId, definition.ProductId
+
+    def get(self, key):
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+                self._snapshots.move_to_end(key)
+            return snapshot
+
+    def put(self, key, snapshot):
+        with self._lock:
+            self._snapshots[key] = snapshot
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+            self._digests.clear()
+
+    def __len__(self):
+        return len(self._snapshots)
+
+
+# Param files loaded by this process
+param_file_cache = ParamFileCache()
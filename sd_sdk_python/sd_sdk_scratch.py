@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+"""
+A word view of the manufacturer data area (scratch memory) that reads on
+demand and writes back only what changed.
+"""
+# Copyright (c) 2022 Semiconductor Components Industries, LLC
+# (d/b/a ON Semiconductor). All Rights Reserved.
+#
+# This code is the property of ON Semiconductor and may not be redistributed
+# in any form without prior written permission from ON Semiconductor. The
+# terms of use and warranty for this code are covered by contractual
+# agreements between ON Semiconductor and the licensee.
+# ----------------------------------------------------------------------------
+# $Revision:  $
+# $Date:  $
+# ----------------------------------------------------------------------------
+import array
+import struct
+import sys
+
+from sd_sdk_python.sd_sdk_metrics import timed_call
+
+# Scratch memory words are 32-bit big-endian
+WORD_SIZE = 4
+_WORD = struct.Struct('>I')
+_SWAP = sys.byteorder == 'little'
+
+
+def _merge(ranges):
+    # Merges (start, end) ranges that overlap or touch
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
+
+class ScratchMemory(object):
+    """
+    The manufacturer data area of a product as 32-bit big-endian words:
+
+        scratch = device.scratch_memory()
+        scratch[3] = 0x12345678
+        scratch[8:10] = [1, 2]
+        scratch.flush()     # one WriteManufacturerData per changed span
+
+    The bytes are held in device byte order in a bytearray. Words are read
+    from the device on first access, one ranged ReadManufacturerData per
+    missing span. Assigning marks the bytes that actually changed (or were
+    never read), and flush() writes only the words holding them, merging
+    spans that are at most 'merge_gap' bytes apart to save round trips.
+    """
+    def __init__(self, product, length=None, merge_gap=2 * WORD_SIZE):
+        self.product = product
+        self.length = product.Definition.ManufacturerDataAreaLength if length is None else length
+        self.merge_gap = merge_gap
+        self._raw = bytearray(self.length)
+        # Byte ranges holding what is on the device
+        self._loaded = []
+        # Byte ranges changed since the last flush
+        self._dirty = []
+
+    def __len__(self):
+        return self.length // WORD_SIZE
+
+    def _missing(self, start, end):
+        # Parts of [start, end) that have not been read yet
+        missing = []
+        position = start
+        for lo, hi in self._loaded:
+            if hi <= position:
+                continue
+            if lo >= end:
+                break
+            if lo > position:
+                missing.append((position, lo))
+            position = max(position, hi)
+            if position >= end:
+                break
+        if position < end:
+            missing.append((position, end))
+        return missing
+
+    def _check(self, offset, length):
+        if offset < 0 or length < 0 or offset + length > self.length:
+            raise IndexError(f"{length} bytes at offset {offset} is outside of the "
+                             f"{self.length} byte manufacturer data area")
+
+    def load(self, offset=0, length=None):
+        """Reads the bytes in [offset, offset + length) that have not been read yet"""
+        length = self.length - offset if length is None else length
+        self._check(offset, length)
+        for start, end in self._missing(offset, offset + length):
+            data = bytes(timed_call('ReadManufacturerData', self.product.ReadManufacturerData, start, end - start,
+                                    nbytes=end - start))
+            self._raw[start:end] = data
+            self._loaded = _merge(self._loaded + [(start, end)])
+
+    def read_bytes(self, offset, length):
+        """Returns length bytes at offset (read from the device only if not already)"""
+        self.load(offset, length)
+        return bytes(self._raw[offset:offset + length])
+
+    def write_bytes(self, offset, data):
+        """Sets the bytes at offset, marking the ones that differ (or were not read) for flush()"""
+        data = memoryview(data).cast('B')
+        self._check(offset, len(data))
+        start, end = offset, offset + len(data)
+        # Unread bytes are always written, read ones only where they differ
+        changed = self._missing(start, end)
+        for lo, hi in self._loaded:
+            lo, hi = max(lo, start), min(hi, end)
+            if lo >= hi:
+                continue
+            old, new = self._raw[lo:hi], data[lo - offset:hi - offset]
+            if old != new:
+                first = next(i for i in range(hi - lo) if old[i] != new[i])
+                last = next(i for i in range(hi - lo - 1, -1, -1) if old[i] != new[i])
+                changed.append((lo + first, lo + last + 1))
+        self._raw[offset:offset + len(data)] = data
+        if changed:
+            self._dirty = _merge(self._dirty + changed)
+            self._loaded = _merge(self._loaded + changed)
+
+    def _word_range(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("Only contiguous slices of scratch memory are supported")
+            return start, max(start, stop)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("scratch memory index out of range")
+        return index, index + 1
+
+    def __getitem__(self, index):
+        start, stop = self._word_range(index)
+        offset, length = start * WORD_SIZE, (stop - start) * WORD_SIZE
+        self.load(offset, length)
+        if not isinstance(index, slice):
+            return _WORD.unpack_from(self._raw, offset)[0]
+        words = array.array('I', self._raw[offset:offset + length])
+        if _SWAP:
+            words.byteswap()
+        return words
+
+    def __setitem__(self, index, value):
+        start, stop = self._word_range(index)
+        if not isinstance(index, slice):
+            self.write_bytes(start * WORD_SIZE, _WORD.pack(value))
+            return
+        words = array.array('I', value)
+        if len(words) != stop - start:
+            raise ValueError("Cannot resize scratch memory")
+        if _SWAP:
+            words.byteswap()
+        self.write_bytes(start * WORD_SIZE, words)
+
+    @property
+    def dirty_ranges(self):
+        """(offset, length) of the byte spans flush() would write"""
+        spans = []
+        for start, end in self._dirty:
+            # Whole words only
+            start -= start % WORD_SIZE
+            end = min(self.length, end + -end % WORD_SIZE)
+            # Join spans separated by a small gap of bytes already read
+            if spans and start - spans[-1][1] <= self.merge_gap and not self._missing(spans[-1][1], start):
+                spans[-1][1] = max(spans[-1][1], end)
+            else:
+                spans.append([start, end])
+        return [(start, end - start) for start, end in spans]
+
+    def flush(self,):
+        """Writes the changed spans to the device. Returns the (offset, length) spans written."""
+        written = self.dirty_ranges
+        for offset, length in written:
+            # Only reads if a span was widened to whole words over unread bytes
+            self.load(offset, length)
+            timed_call('WriteManufacturerData', self.product.WriteManufacturerData, offset, length,
+                       bytes(self._raw[offset:offset + length]), nbytes=length)
+        self._dirty = []
+        return written
+
+    def discard(self,):
+        """Forgets unflushed changes (and everything read) so the next access reads the device again"""
+        self._dirty = []
+        self._loaded = []
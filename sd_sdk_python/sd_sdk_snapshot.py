@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+"""
+Compact snapshots of the parameter values of an Ezairo.
+"""
+# Copyright (c) 2022 Semiconductor Components Industries, LLC
+# (d/b/a ON Semiconductor). All Rights Reserved.
+#
+# This code is the property of ON Semiconductor and may not be redistributed
+# in any form without prior written permission from ON Semiconductor. The
+# terms of use and warranty for this code are covered by contractual
+# agreements between ON Semiconductor and the licensee.
+# ----------------------------------------------------------------------------
+# $Revision:  $
+# $Date:  $
+# ----------------------------------------------------------------------------
+import threading
+from array import array
+
+from sd_sdk_python.sd_sdk_dump import ParameterRecord
+
+# Array type codes for the three kinds of parameter values
+_TYPECODES = {'Value': 'i', 'BooleanValue': 'b', 'DoubleValue': 'd'}
+_BOOLEAN_TYPECODE = 'b'
+
+
+class SnapshotLayout:
+    """
+    The parameter ids of each memory of a product definition, grouped by the
+    kind of value they hold. A layout is built once per product definition
+    and shared by every snapshot taken of that definition, so a snapshot
+    itself only holds typed value arrays.
+    """
+    def __init__(self, key, memories):
+        self.key = key
+        # {memory number: ((typecode, value attribute, (ids...)), ...)}
+        self.memories = memories
+
+    @classmethod
+    def from_device(cls, key, device, memory_numbers):
+        memories = {}
+        for memory_number in memory_numbers:
+            groups = {}
+            for p in device.parameter_index(memory_number).parameters:
+                attribute = device._value_attribute(p)
+                groups.setdefault(attribute, []).append(p.Id)
+            memories[memory_number] = tuple((_TYPECODES[attribute], attribute, tuple(ids))
+                                            for attribute, ids in groups.items())
+        return cls(key, memories)
+
+
+_layouts = {}
+_layouts_lock = threading.Lock()
+
+
+def get_layout(device):
+    """Returns the shared SnapshotLayout for the product definition of an Ezairo"""
+    definition = device.product.Definition
+    key = (definition.LibraryId, definition.ProductId)
+    layout = _layouts.get(key)
+    if layout is None:
+        with _layouts_lock:
+            layout = _layouts.get(key)
+            if layout is None:
+                memory_numbers = [device.sd.kSystemNvmMemory] + list(range(len(device.product.Memories)))
+                layout = _layouts[key] = SnapshotLayout.from_device(key, device, memory_numbers)
+    return layout
+
+
+class ParameterSnapshot:
+    """
+    The values of every system and profile parameter of an Ezairo at one
+    point in time, held as one typed array per value kind per memory.
+    """
+    __slots__ = ('layout', 'values')
+
+    def __init__(self, layout, values):
+        self.layout = layout
+        # {memory number: [array per layout group]}
+        self.values = values
+
+    @classmethod
+    def capture(cls, device):
+        """Captures the host-side parameter values of device (restore them from the device first)"""
+        layout = get_layout(device)
+        values = {}
+        for memory_number, groups in layout.memories.items():
+            by_id = device.parameter_index(memory_number).by_id
+            arrays = []
+            for typecode, attribute, ids in groups:
+                arrays.append(array(typecode, [getattr(by_id[w], attribute) for w in ids]))
+            values[memory_number] = arrays
+        return cls(layout, values)
+
+    @property
+    def nbytes(self):
+        """Bytes used by the value arrays (the shared layout is not counted)"""
+        return sum(a.itemsize * len(a) for arrays in self.values.values() for a in arrays)
+
+    def __iter__(self):
+        """Yields a ParameterRecord per parameter (grouped by value kind within each memory)"""
+        for memory_number, groups in self.layout.memories.items():
+            for (typecode, _, ids), values in zip(groups, self.values[memory_number]):
+                for param_id, value in zip(ids, values):
+                    yield ParameterRecord(memory_number, param_id, bool(value) if typecode == _BOOLEAN_TYPECODE else value)
+
+    def diff(self, other):
+        """
+        Returns the changes that turn this snapshot into 'other' as
+        {memory number: {param_id: value in other}}, with only the memories
+        that differ. Both snapshots must share a layout.
+        """
+        if other.layout is not self.layout:
+            raise ValueError("Snapshots of different product definitions cannot be compared")
+        delta = {}
+        for memory_number, groups in self.layout.memories.items():
+            changes = {}
+            for (typecode, _, ids), mine, theirs in zip(groups, self.values[memory_number], other.values[memory_number]):
+                if mine == theirs:
+                    continue
+                for i, (a, b) in enumerate(zip(mine, theirs)):
+                    if a != b:
+                        changes[ids[i]] = bool(b) if typecode == _BOOLEAN_TYPECODE else b
+            if changes:
+                delta[memory_number] = changes
+        return delta
@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+"""
+Drives several wired programmers in parallel on a production station.
+"""
+# Copyright (c) 2022 Semiconductor Components Industries, LLC
+# (d/b/a ON Semiconductor). All Rights Reserved.
+#
+# This code is the property of ON Semiconductor and may not be redistributed
+# in any form without prior written permission from ON Semiconductor. The
+# terms of use and warranty for this code are covered by contractual
+# agreements between ON Semiconductor and the licensee.
+# ----------------------------------------------------------------------------
+# $Revision:  $
+# $Date:  $
+# ----------------------------------------------------------------------------
+import collections
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+from sd_sdk_python.sd_sdk import Ezairo
+from sd_sdk_python.sd_sdk_metrics import timed_call
+
+logger = logging.getLogger("sd_sdk_station")
+
+
+@dataclass
+class StationSlot:
+    """A programmer (and side) on the station, driven by one worker"""
+    programmer: str
+    side: int
+    library: str
+    interface_options: str = ''
+    # Index of the product to create from the library
+    product_index: int = 0
+    verify_nvm_writes: bool = False
+    name: str = None
+
+    def __post_init__(self):
+        if self.name is None:
+            self.name = f"{self.programmer}/{self.side}"
+
+
+@dataclass
+class StationJob:
+    """One unit to program"""
+    param_file: str
+    configure_device: bool = False
+    write_manufacturer_data: bool = False
+    write_voice_alerts: bool = False
+    burn: bool = True
+    # Name of the slot that must run this job (e.g. the fixture holding the
+    # unit), or None for the first free slot
+    slot: str = None
+    tag: object = None
+
+
+@dataclass
+class StationJobResult:
+    job: StationJob
+    slot: str = None
+    # The value returned by the program callable (by default the serial ID)
+    result: object = None
+    # repr() of the exception that failed the job
+    error: str = None
+    # {step name: seconds}, in the order the steps ran
+    steps: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+@dataclass
+class StationReport:
+    results: list = field(default_factory=list)
+    wall_seconds: float = 0.0
+
+    @property
+    def succeeded(self):
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def units_per_hour(self):
+        return len(self.succeeded) * 3600.0 / self.wall_seconds if self.wall_seconds else 0.0
+
+    def step_summary(self,) -> dict:
+        """Returns {step name: {'count', 'mean', 'max'}} over every job that ran the step"""
+        times = collections.defaultdict(list)
+        for r in self.results:
+            for step, seconds in r.steps.items():
+                times[step].append(seconds)
+        return {step: {'count': len(t), 'mean': sum(t) / len(t), 'max': max(t)} for step, t in times.items()}
+
+    def to_dict(self,) -> dict:
+        return {
+            'wall_seconds': self.wall_seconds,
+            'units_per_hour': self.units_per_hour,
+            'succeeded': len(self.succeeded),
+            'failed': len(self.failed),
+            'steps': self.step_summary(),
+            'jobs': [{'param_file': str(r.job.param_file), 'tag': r.job.tag, 'slot': r.slot,
+                      'ok': r.ok, 'error': r.error, 'seconds': r.seconds, 'steps': r.steps}
+                     for r in self.results],
+        }
+
+
+@dataclass
+class StationContext:
+    """What a worker opens once for its slot and uses for every job"""
+    sd: object
+    interface: object
+    product: object
+    slot: StationSlot = None
+
+
+def open_station(slot):
+    """Creates the product and communication interface of a slot (runs in the worker)"""
+    from sd_sdk_python import get_sdk, get_product_manager, load_library
+    sd = get_sdk()
+    product_manager = get_product_manager()
+    library = load_library(slot.library)
+    product = library.Products[slot.product_index].CreateProduct()
+    interface = product_manager.CreateCommunicationInterface(slot.programmer, slot.side, slot.interface_options)
+    interface.VerifyNvmWrites = slot.verify_nvm_writes
+    return StationContext(sd, interface, product, slot)
+
+
+def program_device(context, job, step):
+    """
+    Detects, initializes (or configures), loads the param file into and
+    burns one unit. 'step(name)' is called as each step starts. Returns the
+    serial ID of the unit.
+    """
+    step('detect')
+    device_info = timed_call('DetectDevice', context.interface.DetectDevice, device=getattr(context.slot, 'name', None))
+    if device_info is None or not device_info.IsValid:
+        raise RuntimeError("No valid device detected")
+    try:
+        step('initialize')
+        if not context.product.InitializeDevice(context.interface):
+            context.product.ConfigureDevice()
+        device = Ezairo(context.sd, context.interface, device_info, context.product)
+        step('load_param_file')
+        device.load_param_file(job.param_file, job.configure_device, job.write_manufacturer_data,
+                               job.write_voice_alerts)
+        if job.burn:
+            step('burn')
+            device.burn_all_parameters()
+        return device.device_info.serial_id
+    finally:
+        context.product.CloseDevice()
+
+
+def _worker_main(index, generation, slot, open_fn, program_fn, inbox, outbox):
+    # Runs in the worker process (or thread). Every message to the scheduler
+    # carries (index, generation) so that messages from a worker that was
+    # replaced are ignored.
+    try:
+        context = open_fn(slot)
+    except Exception as e:
+        outbox.put(('failed', index, generation, repr(e)))
+        return
+    outbox.put(('ready', index, generation, None))
+    while True:
+        job = inbox.get()
+        if job is None:
+            return
+        result = StationJobResult(job, slot.name)
+        start = last = time.perf_counter()
+        current = None
+
+        def step(name):
+            nonlocal current, last
+            now = time.perf_counter()
+            if current is not None:
+                result.steps[current] = now - last
+            current, last = name, now
+            outbox.put(('step', index, generation, name))
+
+        try:
+            result.result = program_fn(context, job, step)
+        except Exception as e:
+            result.error = repr(e)
+        now = time.perf_counter()
+        if current is not None:
+            result.steps[current] = now - last
+        result.seconds = now - start
+        outbox.put(('done', index, generation, result))
+
+
+class _Worker(object):
+    def __init__(self, index, slot):
+        self.index = index
+        self.slot = slot
+        self.generation = 0
+        self.handle = None
+        self.inbox = None
+        # 'starting', 'idle', 'busy' or 'dead'
+        self.state = 'dead'
+        self.job = None
+        self.step = None
+        self.deadline = None
+
+
+class StationScheduler(object):
+    """
+    Programs units on several wired programmers at once, one worker per
+    StationSlot, taking jobs from a shared queue:
+
+        slots = [StationSlot('Communication Accelerator Adaptor', sd.kLeft, library, 'port=1'),
+                 StationSlot('Communication Accelerator Adaptor', sd.kLeft, library, 'port=2')]
+        with StationScheduler(slots) as station:
+            report = station.run([StationJob(param_file) for _ in range(20)])
+        print(report.units_per_hour, report.step_summary())
+
+    Each worker opens its slot once (open_station) and then runs
+    program(context, job, step) for every job (program_device by default).
+    With use_processes (the default) every worker is a separate process
+    with its own SDK instance, so a step that takes longer than
+    'step_timeout' seconds is killed, its job is failed and the worker is
+    restarted without holding up the other slots. Thread workers share one
+    SDK instance; a hung thread cannot be killed, so its slot is retired.
+
+    open_station and program must be module-level functions when using
+    processes (they are pickled to the workers).
+    """
+    def __init__(self, slots, open_station=open_station, program=program_device, step_timeout=120.0,
+                 use_processes=True, mp_context=None):
+        self.slots = list(slots)
+        self.open_station = open_station
+        self.program = program
+        self.step_timeout = step_timeout
+        self.use_processes = use_processes
+        self._mp = mp_context if mp_context is not None else multiprocessing.get_context()
+        self._outbox = self._mp.Queue() if use_processes else queue.Queue()
+        self._workers = [_Worker(i, slot) for i, slot in enumerate(self.slots)]
+        self._started = False
+
+    def _start_worker(self, worker):
+        worker.generation += 1
+        args = (worker.index, worker.generation, worker.slot, self.open_station, self.program)
+        if self.use_processes:
+            worker.inbox = self._mp.Queue()
+            worker.handle = self._mp.Process(target=_worker_main, args=args + (worker.inbox, self._outbox),
+                                             name=f"StationWorker-{worker.slot.name}", daemon=True)
+        else:
+            worker.inbox = queue.Queue()
+            worker.handle = threading.Thread(target=_worker_main, args=args + (worker.inbox, self._outbox),
+                                             name=f"StationWorker-{worker.slot.name}", daemon=True)
+        worker.state = 'starting'
+        worker.job = None
+        worker.deadline = time.monotonic() + self.step_timeout
+        worker.handle.start()
+
+    def start(self,):
+        """Starts the workers (run() does this on first use)"""
+        if not self._started:
+            self._started = True
+            for worker in self._workers:
+                self._start_worker(worker)
+
+    def _fail(self, worker, error, results):
+        results.append(StationJobResult(worker.job, worker.slot.name, error=error))
+        worker.job = None
+
+    def _kill(self, worker, reason, results, restart=True):
+        logger.error(f"Worker for {worker.slot.name}: {reason}")
+        if worker.job is not None:
+            self._fail(worker, reason, results)
+        if self.use_processes:
+            worker.handle.terminate()
+            worker.handle.join(5.0)
+            if restart:
+                self._start_worker(worker)
+            else:
+                worker.state = 'dead'
+        else:
+            # A thread cannot be stopped, and it still owns the interface.
+            # Retire it: ignore whatever it reports when (if ever) the step
+            # returns, and let it exit then.
+            worker.generation += 1
+            worker.state = 'dead'
+            worker.inbox.put(None)
+
+    def _assign(self, pending):
+        now = time.monotonic()
+        for worker in self._workers:
+            if worker.state != 'idle':
+                continue
+            job = next((j for j in pending if j.slot is None or j.slot == worker.slot.name), None)
+            if job is None:
+                continue
+            pending.remove(job)
+            worker.job, worker.step, worker.state = job, None, 'busy'
+            worker.deadline = now + self.step_timeout
+            worker.inbox.put(job)
+
+    def _handle(self, message, results):
+        kind, index, generation, payload = message
+        worker = self._workers[index]
+        if generation != worker.generation:
+            return
+        if kind == 'ready':
+            worker.state = 'idle'
+        elif kind == 'failed':
+            logger.error(f"Failed to open {worker.slot.name}: {payload}")
+            worker.state = 'dead'
+        elif kind == 'step':
+            worker.step = payload
+            worker.deadline = time.monotonic() + self.step_timeout
+        elif kind == 'done':
+            results.append(payload)
+            worker.job, worker.step, worker.state = None, None, 'idle'
+
+    def run(self, jobs):
+        """
+        Runs every job and returns a StationReport once they have all
+        finished (or failed). Workers stay up for the next run until close().
+        """
+        self.start()
+        pending = collections.deque(jobs)
+        results = []
+        start = time.perf_counter()
+        while True:
+            self._assign(pending)
+            # Workers still opening their slot only matter while there are jobs left
+            busy = [w for w in self._workers if w.state == 'busy' or (w.state == 'starting' and pending)]
+            if not busy:
+                break
+            timeout = max(0.0, min(w.deadline for w in busy) - time.monotonic())
+            try:
+                self._handle(self._outbox.get(timeout=min(timeout, 0.5)), results)
+                continue
+            except queue.Empty:
+                pass
+            now = time.monotonic()
+            for worker in busy:
+                if worker.state == 'starting' and now > worker.deadline:
+                    self._kill(worker, "timed out opening the slot", results, restart=False)
+                elif worker.state == 'busy' and now > worker.deadline:
+                    self._kill(worker, f"TimeoutError('{worker.step or 'job'} took longer than "
+                                       f"{self.step_timeout}s')", results)
+                elif self.use_processes and not worker.handle.is_alive() and worker.state == 'busy':
+                    self._kill(worker, f"worker exited with code {worker.handle.exitcode}", results)
+        # Jobs no live worker can take
+        for job in pending:
+            results.append(StationJobResult(job, job.slot, error="RuntimeError('No slot available to run the job')"))
+        report = StationReport(results, time.perf_counter() - start)
+        logger.debug(f"Programmed {len(report.succeeded)}/{len(results)} units in {report.wall_seconds:.1f}s "
+                     f"({report.units_per_hour:.0f} units/hour)")
+        return report
+
+    def close(self,):
+        """Stops the workers"""
+        for worker in self._workers:
+            if worker.state in ('idle', 'busy', 'starting'):
+                worker.inbox.put(None)
+        for worker in self._workers:
+            if worker.handle is not None:
+                worker.handle.join(5.0)
+                if self.use_processes and worker.handle.is_alive():
+                    worker.handle.terminate()
+            worker.state = 'dead'
+        self._started = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+"""
+Opt-in timeline tracing of SDK calls and events, exported as Chrome trace
+JSON (viewable in Perfetto or chrome://tracing).
+"""
+# Copyright (c) 2022 Semiconductor Components Industries, LLC
+# (d/b/a ON Semiconductor). All Rights Reserved.
+#
+# This code is the property of ON Semiconductor and may not be redistributed
+# in any form without prior written permission from ON Semiconductor. The
+# terms of use and warranty for this code are covered by contractual
+# agreements between ON Semiconductor and the licensee.
+# ----------------------------------------------------------------------------
+# $Revision:  $
+# $Date:  $
+# ----------------------------------------------------------------------------
+import collections
+import contextlib
+import json
+import os
+import threading
+import time
+
+from sd_sdk_python import sd_sdk_metrics
+
+# Default number of spans kept (the oldest are dropped first)
+TRACE_CAPACITY = 100000
+
+# Span: (name, category, start, end, thread ID, device, memory, args) with
+# start/end from time.perf_counter() and end None for instant events
+Span = collections.namedtuple('Span', 'name category start end thread device memory args')
+
+# Checked by the instrumented code before recording anything
+active = False
+_spans = collections.deque(maxlen=TRACE_CAPACITY)
+_thread_names = {}
+
+
+def _thread():
+    ident = threading.get_ident()
+    if ident not in _thread_names:
+        _thread_names[ident] = threading.current_thread().name
+    return ident
+
+
+def record(name, start, end, device=None, memory=None, category='sdk', args=None):
+    """Records a span that ran from start to end (time.perf_counter() values) on this thread"""
+    if active:
+        _spans.append(Span(name, category, start, end, _thread(), device, memory, args))
+
+
+def instant(name, device=None, memory=None, category='event', args=None):
+    """Records a point in time on this thread"""
+    if active:
+        _spans.append(Span(name, category, time.perf_counter(), None, _thread(), device, memory, args))
+
+
+@contextlib.contextmanager
+def span(name, device=None, memory=None, category='sdk', args=None):
+    """Records the with block as a span (when tracing)"""
+    if not active:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, start, time.perf_counter(), device, memory, category, args)
+
+
+def _record_call(operation, start, end, memory, device, error):
+    _spans.append(Span(operation, 'sdk', start, end, _thread(), device, memory,
+                       {'error': True} if error else None))
+
+
+def enable(capacity=None):
+    """
+    Starts tracing SDK calls (everything made through
+    sd_sdk_metrics.timed_call), event dispatch and wireless connects,
+    keeping the last 'capacity' spans (default TRACE_CAPACITY).
+    """
+    global active, _spans
+    if capacity is not None and capacity != _spans.maxlen:
+        _spans = collections.deque(_spans, maxlen=capacity)
+    active = True
+    sd_sdk_metrics.set_tracer(_record_call)
+
+
+def disable():
+    """Stops tracing (the spans recorded so far are kept)"""
+    global active
+    active = False
+    sd_sdk_metrics.set_tracer(None)
+
+
+def clear():
+    _spans.clear()
+
+
+def spans():
+    """Returns the recorded spans, oldest first"""
+    return list(_spans)
+
+
+def to_chrome_trace(spans_=None) -> dict:
+    """Returns the spans as a Chrome trace ('Trace Event Format') dict"""
+    spans_ = spans() if spans_ is None else spans_
+    pid = os.getpid()
+    events = [{'ph': 'M', 'name': 'process_name', 'pid': pid, 'tid': 0, 'args': {'name': 'sd_sdk_python'}}]
+    events += [{'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+               for tid, name in list(_thread_names.items())]
+    for s in spans_:
+        args = dict(s.args) if s.args else {}
+        if s.device is not None:
+            args['device'] = str(s.device)
+        if s.memory is not None:
+            args['memory'] = s.memory
+        event = {'name': s.name, 'cat': s.category, 'pid': pid, 'tid': s.thread,
+                 'ts': s.start * 1e6, 'args': args}
+        if s.end is None:
+            event.update(ph='i', s='t')
+        else:
+            event.update(ph='X', dur=(s.end - s.start) * 1e6)
+        events.append(event)
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def dump(file):
+    """Writes the spans as Chrome trace JSON to a path or a text file object"""
+    trace = to_chrome_trace()
+    if hasattr(file, 'write'):
+        json.dump(trace, file, default=str)
+    else:
+        with open(file, 'w') as f:
+            json.dump(trace, f, default=str)
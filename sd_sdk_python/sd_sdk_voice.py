@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+"""
+Helpers for writing voice alerts: mapping the data from files, hashing it
+and remembering what each device holds.
+"""
+# Copyright (c) 2022 Semiconductor Components Industries, LLC
+# (d/b/a ON Semiconductor). All Rights Reserved.
+#
+# This code is the property of ON Semiconductor and may not be redistributed
+# in any form without prior written permission from ON Semiconductor. The
+# terms of use and warranty for this code are covered by contractual
+# agreements between ON Semiconductor and the licensee.
+# ----------------------------------------------------------------------------
+# $Revision:  $
+# $Date:  $
+# ----------------------------------------------------------------------------
+import contextlib
+import hashlib
+import mmap
+import os
+import threading
+
+# Size of the content hash stored for a set of voice alerts
+HASH_SIZE = 8
+# Bytes hashed between progress reports
+HASH_CHUNK = 1 << 20
+
+
+@contextlib.contextmanager
+def open_voice_alerts(source):
+    """
+    Yields a read-only memoryview of voice alert data given as a path
+    (memory-mapped, not read into memory) or a bytes-like object such as
+    bytes, bytearray, mmap or memoryview (not copied).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield memoryview(b'')
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    yield view
+                finally:
+                    view.release()
+    else:
+        # Release the views on exit so that e.g. an mmap can be closed
+        with memoryview(source) as view:
+            if view.format == 'B' and view.ndim == 1:
+                yield view
+            else:
+                with view.cast('B') as cast:
+                    yield cast
+
+
+def content_hash(view, on_progress=None, chunk_size=HASH_CHUNK):
+    """
+    Returns the HASH_SIZE byte BLAKE2b digest of view, hashing it in chunks
+    (calling on_progress('hash', fraction) after each one).
+    """
+    digest = hashlib.blake2b(digest_size=HASH_SIZE)
+    total = len(view)
+    for offset in range(0, total, chunk_size):
+        digest.update(view[offset:offset + chunk_size])
+        if on_progress is not None:
+            on_progress('hash', min(offset + chunk_size, total) / total)
+    return digest.digest()
+
+
+class VoiceAlertRegistry(object):
+    """
+    The content hash of the voice alerts last written to each device by
+    this process, keyed by (library ID, product ID, serial ID). Used when
+    the hash is not stored on the device itself.
+    """
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(device_info):
+        if device_info is None or not getattr(device_info, 'serial_id', 0):
+            # The device can't be told apart from others
+            return None
+        return device_info.library_id, device_info.product_id, device_info.serial_id
+
+    def get(self, device_info):
+        key = self.key(device_info)
+        return None if key is None else self._hashes.get(key)
+
+    def set(self, device_info, digest):
+        key = self.key(device_info)
+        if key is not None:
+            with self._lock:
+                self._hashes[key] = digest
+
+    def forget(self, device_info):
+        key = self.key(device_info)
+        if key is not None:
+            with self._lock:
+                self._hashes.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._hashes.clear()
+
+
+# Voice alerts written by this process
+voice_alert_registry = VoiceAlertRegistry()
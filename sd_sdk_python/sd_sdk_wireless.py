@@ -18,66 +18,420 @@ import threading
 import json
 import logging
 import time
-
-from sd_sdk_python import get_product_manager
+import weakref
+import queue
+import collections
+import collections.abc
+import contextlib
+import re
+import asyncio
+from dataclasses import dataclass
+
+from sd_sdk_python import get_product_manager, sd, _sdk_lock, _startup_timings
 from sd_sdk_python.sd_sdk import DeviceInfo
-import sd
+from sd_sdk_python import sd_sdk_trace
+from sd_sdk_python.sd_sdk_metrics import timed_call
 
 logger = logging.getLogger("sd_sdk_wireless")
 
 
+# Defaults used when the process-wide event monitor is created (change them
+# before the first call to get_event_monitor()).
+#
+# EVENT_QUEUE_SIZE          Maximum number of events queued per listener
+# EVENT_OVERFLOW_POLICY     What happens when a listener's queue is full:
+#                           'drop_oldest'    discard the oldest queued event
+#                           'coalesce_scans' replace a queued scan event for the
+#                                            same device (else drop the oldest)
+#                           'block'          hold up the SDK event thread until
+#                                            the listener catches up
+# EVENT_DISPATCH_WORKERS    Number of threads calling listeners
+EVENT_QUEUE_SIZE = 256
+EVENT_OVERFLOW_POLICY = 'coalesce_scans'
+EVENT_DISPATCH_WORKERS = 2
+
+OVERFLOW_POLICIES = ('drop_oldest', 'coalesce_scans', 'block')
+
+
+def parse_event_data(event_data):
+    # The JSON string for an event is a dict of list of dicts. In other words:
+    #
+    # {'Event': [{Data1 : Value1}, {Data2 : Value2}] }
+    # 
+    # This function flattens that into a simple dictionary of key:value pairs
+    return_dict = {}
+    for d in json.loads(event_data)['Event']:
+        for key, val in d.items():
+            return_dict[key] = val
+    return return_dict
+
+
+_DEVICE_ID_PATTERN = re.compile(r'"DeviceID"\s*:\s*"([^"\\]*)"')
+
+# Put on a WirelessScan's queue by stop() so that a blocked iterator returns
+_STOP = object()
+_decode_lock = threading.Lock()
+
+
+class LazyEventData(collections.abc.MutableMapping):
+    """
+    The data of an SDK event while it is routed and queued, decoded from its
+    JSON string on first access. Looking up 'DeviceID' (which the monitor
+    does to route and coalesce events) does not decode the event. Listeners
+    are given the decoded dict, never this object.
+    """
+    __slots__ = ('raw', '_data')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            data = parse_event_data(self.raw)
+            with _decode_lock:
+                # Listeners on other dispatch workers may decode concurrently;
+                # they must all see (and mutate) the same dict
+                if self._data is None:
+                    self._data = data
+        return self._data
+
+    @property
+    def decoded(self):
+        return self._data is not None
+
+    def get(self, key, default=None):
+        if key == 'DeviceID' and self._data is None:
+            match = _DEVICE_ID_PATTERN.search(self.raw)
+            if match is not None:
+                return match.group(1)
+        return self.data.get(key, default)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f"LazyEventData({self.data!r})"
+
+
+class _ListenerQueue(object):
+    # The bounded queue of events waiting to be delivered to one listener.
+    # At most one dispatch worker delivers from a queue at a time, so each
+    # listener sees its events in order.
+    def __init__(self, ref, maxlen, overflow):
+        self.ref = ref
+        self.maxlen = maxlen
+        self.overflow = overflow
+        self.events = collections.deque()
+        self.cond = threading.Condition(threading.Lock())
+        self.scheduled = False
+        self.closed = False
+        self.dropped = 0
+        self.coalesced = 0
+        self.delivered = 0
+        self.max_depth = 0
+
+    def _coalesce(self, event_type, event_data):
+        device_id = event_data.get('DeviceID')
+        for i, queued in enumerate(self.events):
+            if queued[0] == event_type and queued[1].get('DeviceID') == device_id:
+                self.events[i] = (event_type, event_data, queued[2])
+                self.coalesced += 1
+                return True
+        return False
+
+    def put(self, event_type, event_data, timestamp):
+        # Returns True if the queue needs to be scheduled on a worker
+        with self.cond:
+            if self.closed:
+                return False
+            if len(self.events) >= self.maxlen:
+                if self.overflow == 'block':
+                    while len(self.events) >= self.maxlen and not self.closed:
+                        self.cond.wait()
+                    if self.closed:
+                        # Unsubscribed while waiting
+                        return False
+                elif self.overflow == 'coalesce_scans' and event_type == sd.kScanEvent and \
+                        self._coalesce(event_type, event_data):
+                    return False
+                else:
+                    self.events.popleft()
+                    self.dropped += 1
+            self.events.append((event_type, event_data, timestamp))
+            self.max_depth = max(self.max_depth, len(self.events))
+            if self.scheduled:
+                return False
+            self.scheduled = True
+            return True
+
+    def pop(self):
+        # Returns the next event, or None (and unschedules) if empty
+        with self.cond:
+            if not self.events:
+                self.scheduled = False
+                return None
+            event = self.events.popleft()
+            self.cond.notify()
+            return event
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.events.clear()
+            self.cond.notify_all()
+
+
 class SDKEventMonitor(object):
-    def __init__(self,):
-        self.listeners = []
+    def __init__(self, queue_size=None, overflow=None, workers=None):
+        self.queue_size = EVENT_QUEUE_SIZE if queue_size is None else queue_size
+        self.overflow = EVENT_OVERFLOW_POLICY if overflow is None else overflow
+        if self.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{self.overflow}' (one of {OVERFLOW_POLICIES})")
+        self._lock = threading.Lock()
+        # Dispatch index: {(event type or None, device ID or None): (_ListenerQueue, ...)}
+        # where None matches any event type/device. It is replaced as a whole
+        # on (un)subscribe so the monitor thread can read it without locking.
+        self._routes = {}
+        # {id(listener): (_ListenerQueue, [route keys])}
+        self._subscriptions = {}
+        # (id, weak reference) of collected listeners, removed by _prune().
+        # Weak reference callbacks can run on any thread in the middle of
+        # anything (including while self._lock is held), so they only append
+        # here rather than taking the lock.
+        self._collected = collections.deque()
+        # Listener queues with events waiting, served by the dispatch workers
+        self._ready = queue.SimpleQueue()
+        self._stats_lock = threading.Lock()
+        self.ingested = 0
+        # Events read from the SDK that no listener was subscribed to
+        self.skipped = 0
+        # Event types with at least one subscriber (None: all types)
+        self._subscribed_types = frozenset()
+        self._latency_count = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self.workers = []
+        for i in range(EVENT_DISPATCH_WORKERS if workers is None else workers):
+            worker = threading.Thread(target=self._dispatch_worker, name=f"SDKEventDispatch-{i}")
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
         self.sdk_event_handler = get_product_manager().GetEventHandler()
-        self.thread = threading.Thread(target=self.monitor_SDK)
+        self.thread = threading.Thread(target=self.monitor_SDK, name="SDKEventMonitor")
         self.thread.daemon = True
         self.thread.start()
 
     def monitor_SDK(self, ):
-        # This function runs in a background thread and notifies
-        # any subscribed listeners of the events as they come in
-        # from the SDK.
+        # This function runs in a background thread and queues the events
+        # as they come in from the SDK for the dispatch workers to deliver
+        # to any subscribed listeners. It never calls listeners itself, so a
+        # slow listener cannot hold up the SDK event queue.
         while True:
-            event = self.sdk_event_handler.GetEvent()
-            data = self.parse_event_data(event.Data)
-            self.notify(event.Type, data)
+            self.ingest(self.sdk_event_handler.GetEvent())
+
+    def ingest(self, event):
+        # Queues one SDK event. Events nobody subscribed to are dropped
+        # without fetching or decoding their data, and the rest are only
+        # decoded when first delivered (so not when dropped or coalesced).
+        event_type = event.Type
+        subscribed_types = self._subscribed_types
+        if event_type not in subscribed_types and None not in subscribed_types:
+            self.skipped += 1
+            return
+        self.notify(event_type, LazyEventData(event.Data))
+
+    def has_subscribers(self, event_type):
+        subscribed_types = self._subscribed_types
+        return event_type in subscribed_types or None in subscribed_types
 
     def parse_event_data(self, event_data):
-        # The JSON string for an event is a dict of list of dicts. In other words:
-        #
-        # {'Event': [{Data1 : Value1}, {Data2 : Value2}] }
-        # 
-        # This function flattens that into a simple dictionary of key:value pairs
-        return_dict = {}
-        for d in json.loads(event_data)['Event']:
-            for key, val in d.items():
-                return_dict[key] = val
-        return return_dict
+        return parse_event_data(event_data)
+
+    @property
+    def listeners(self):
+        return [q.ref() for q, _ in list(self._subscriptions.values()) if q.ref() is not None]
+
+    def subscribe(self, item, event_types=None, device_id=None):
+        # Subscribes item to events of the given types (all types if None)
+        # for the given device ID (all devices if None). Subscribing an item
+        # again replaces its previous subscription. Items are held by weak
+        # reference and are unsubscribed automatically when collected.
+        key = id(item)
+        ref = weakref.ref(item, lambda ref, key=key, collected=self._collected: collected.append((key, ref)))
+        listener_queue = _ListenerQueue(ref, self.queue_size, self.overflow)
+        route_keys = [(t, device_id) for t in (event_types if event_types is not None else (None,))]
+        with self._lock:
+            self._prune()
+            routes = self._without(key)
+            for route_key in route_keys:
+                routes[route_key] = routes.get(route_key, ()) + (listener_queue,)
+            self._subscriptions[key] = (listener_queue, route_keys)
+            self._set_routes(routes)
+
+    def _set_routes(self, routes):
+        self._routes = routes
+        self._subscribed_types = frozenset(t for t, _ in routes)
+
+    def _without(self, key):
+        # Returns a copy of the dispatch index without the subscription 'key'
+        routes = dict(self._routes)
+        listener_queue, route_keys = self._subscriptions.pop(key, (None, ()))
+        if listener_queue is not None:
+            listener_queue.close()
+        for route_key in route_keys:
+            remaining = tuple(q for q in routes.get(route_key, ()) if q is not listener_queue)
+            if remaining:
+                routes[route_key] = remaining
+            else:
+                routes.pop(route_key, None)
+        return routes
+
+    def _prune(self):
+        # Called with self._lock held. Unsubscribes the collected listeners.
+        while self._collected:
+            key, ref = self._collected.popleft()
+            listener_queue = self._subscriptions.get(key, (None,))[0]
+            if listener_queue is None or listener_queue.ref is not ref:
+                # Already unsubscribed, or the collected item's id has been reused
+                continue
+            self._set_routes(self._without(key))
+
+    def _subscription_of(self, item):
+        # Called with self._lock held. Returns the key of item's subscription,
+        # or None (a collected listener's id may since have been reused).
+        self._prune()
+        key = id(item)
+        listener_queue = self._subscriptions.get(key, (None,))[0]
+        if listener_queue is None or listener_queue.ref() is not item:
+            return None
+        return key
 
     def add_listener(self, item):
-        # Add the item to the list of listeners to be notified of events
-        if item not in self.listeners:
-            self.listeners.append(item)
+        # Add the item to the listeners to be notified of all events
+        with self._lock:
+            subscribed = self._subscription_of(item) is not None
+        if not subscribed:
+            self.subscribe(item)
 
     def remove_listener(self, item):
-        # Removes the item to the list of listeners to be notified of events
-        if item in self.listeners:
-            self.listeners.remove(item)
+        # Removes the item from the listeners to be notified of events
+        with self._lock:
+            key = self._subscription_of(item)
+            if key is not None:
+                self._set_routes(self._without(key))
 
     def notify(self, event_type, event_data):
-        for listener in self.listeners:
-            listener.notify(event_type, event_data)
-
-
-_event_monitor = SDKEventMonitor()
+        # Queues an event for every listener subscribed to it
+        if self._collected:
+            with self._lock:
+                self._prune()
+        routes = self._routes
+        device_id = event_data.get('DeviceID')
+        route_keys = ((event_type, None), (None, None))
+        if device_id is not None:
+            route_keys += ((event_type, device_id), (None, device_id))
+        timestamp = time.perf_counter()
+        self.ingested += 1
+        if sd_sdk_trace.active:
+            sd_sdk_trace.instant(f"event {event_type}", device=device_id)
+        for route_key in route_keys:
+            for listener_queue in routes.get(route_key, ()):
+                if listener_queue.put(event_type, event_data, timestamp):
+                    self._ready.put(listener_queue)
+
+    def _dispatch_worker(self):
+        while True:
+            listener_queue = self._ready.get()
+            event = listener_queue.pop()
+            if event is None:
+                continue
+            event_type, event_data, timestamp = event
+            listener = listener_queue.ref()
+            if listener is not None:
+                if isinstance(event_data, LazyEventData):
+                    # Decoded once; every listener gets the same plain dict
+                    event_data = event_data.data
+                latency = time.perf_counter() - timestamp
+                with self._stats_lock:
+                    self._latency_count += 1
+                    self._latency_total += latency
+                    self._latency_max = max(self._latency_max, latency)
+                start = time.perf_counter()
+                try:
+                    listener.notify(event_type, event_data)
+                except Exception:
+                    logger.exception(f"Exception in event listener {listener!r}")
+                if sd_sdk_trace.active:
+                    sd_sdk_trace.record(f"notify {type(listener).__name__}", start, time.perf_counter(),
+                                        device=event_data.get('DeviceID'), category='event',
+                                        args={'event_type': event_type, 'queue_latency_ms': latency * 1e3})
+                listener_queue.delivered += 1
+                # Don't keep the listener alive while waiting for more events
+                listener = None
+            # Let other listeners have a turn before delivering the next event
+            self._ready.put(listener_queue)
+
+    def stats(self):
+        # Returns a snapshot of the event pipeline counters. Latencies are
+        # the time (in seconds) from an event being queued to its listener
+        # being called.
+        subscriptions = list(self._subscriptions.values())
+        with self._stats_lock:
+            count, total, maximum = self._latency_count, self._latency_total, self._latency_max
+        return {
+            'ingested': self.ingested,
+            'skipped': self.skipped,
+            'delivered': sum(q.delivered for q, _ in subscriptions),
+            'dropped': sum(q.dropped for q, _ in subscriptions),
+            'coalesced': sum(q.coalesced for q, _ in subscriptions),
+            'queue_depth': sum(len(q.events) for q, _ in subscriptions),
+            'max_queue_depth': max([q.max_depth for q, _ in subscriptions], default=0),
+            'dispatch_latency': {
+                'count': count,
+                'mean': total / count if count else 0.0,
+                'max': maximum,
+            },
+        }
+
+
+_event_monitor = None
+
+
+def get_event_monitor():
+    """Returns the process-wide SDKEventMonitor, starting it on first use (thread-safe)"""
+    global _event_monitor
+    if _event_monitor is None:
+        with _sdk_lock:
+            if _event_monitor is None:
+                start = time.perf_counter()
+                _event_monitor = SDKEventMonitor()
+                _startup_timings['event_monitor'] = time.perf_counter() - start
+    return _event_monitor
 
 
 class SDKEventHandler:
+    # The events routed to notify(): None means all event types/devices
+    event_types = None
+    device_id = None
+
     def listen_for_events(self, should_listen):
         if should_listen:
-            _event_monitor.add_listener(self)
-        else:
+            get_event_monitor().subscribe(self, self.event_types, self.device_id)
+        elif _event_monitor is not None:
             _event_monitor.remove_listener(self)
 
     def __enter__(self):
@@ -92,6 +446,8 @@ class SDKEventHandler:
 
 
 class ScanResultHandler(SDKEventHandler):
+    event_types = (sd.kScanEvent,)
+
     def __init__(self, on_scan_event, listen=True) -> None:
         super().__init__()
         self.on_scan_event = on_scan_event
@@ -121,9 +477,118 @@ class ScanResultHandler(SDKEventHandler):
             except Exception as e:
                 logger.error(e)
 
+            scan_registry.record(event_data)
             self.on_scan_event(event_data)
 
 
+@dataclass
+class ScanRecord:
+    device_id: str
+    # time.monotonic() timestamps
+    first_seen: float
+    last_seen: float
+    # Number of scan events seen for the device
+    count: int = 1
+    # Exponentially smoothed RSSI (dBm), and the last raw value
+    rssi: float = None
+    last_rssi: float = None
+    # From the parsed 'ManufacturingData' (see ScanResultHandler.parse_manufacturing_data)
+    side: int = None
+    # The fields of the most recent scan event
+    data: dict = None
+
+    def age(self, now=None):
+        return (time.monotonic() if now is None else now) - self.last_seen
+
+
+class ScanRegistry(object):
+    """
+    Recent scan results, one record per device ID, kept across scans so that
+    a device seen recently can be connected to without scanning again.
+    Records not seen for 'ttl' seconds are evicted. 'rssi_smoothing' is the
+    weight given to each new RSSI reading (1.0 keeps only the latest).
+    """
+    def __init__(self, ttl=60.0, rssi_smoothing=0.3):
+        self.ttl = ttl
+        self.rssi_smoothing = rssi_smoothing
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def record(self, event_data):
+        device_id = event_data.get('DeviceID')
+        if device_id is None:
+            return None
+        now = time.monotonic()
+        data = dict(event_data)
+        rssi = data.get('RSSI')
+        try:
+            rssi = None if rssi is None else float(rssi)
+        except ValueError:
+            rssi = None
+        manufacturing_data = data.get('ManufacturingData')
+        side = manufacturing_data.get('side') if isinstance(manufacturing_data, dict) else None
+        with self._lock:
+            record = self._records.get(device_id)
+            if record is None:
+                record = self._records[device_id] = ScanRecord(device_id, now, now, rssi=rssi)
+            else:
+                record.count += 1
+                record.last_seen = now
+                if rssi is not None:
+                    if record.rssi is None:
+                        record.rssi = rssi
+                    else:
+                        record.rssi += self.rssi_smoothing * (rssi - record.rssi)
+            record.last_rssi = rssi if rssi is not None else record.last_rssi
+            record.side = side if side is not None else record.side
+            record.data = data
+            return record
+
+    def evict(self, now=None):
+        """Removes records older than ttl. Returns the number removed."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [k for k, r in self._records.items() if now - r.last_seen > self.ttl]
+            for device_id in expired:
+                del self._records[device_id]
+        return len(expired)
+
+    def get(self, device_id, max_age=None):
+        """Returns the record of device_id if it was seen within max_age (default: ttl) seconds"""
+        record = self._records.get(device_id)
+        if record is None or record.age() > (self.ttl if max_age is None else max_age):
+            return None
+        return record
+
+    def devices(self, max_age=None, side=None):
+        """Returns the records seen within max_age (default: ttl) seconds, optionally for one side"""
+        self.evict()
+        now = time.monotonic()
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            records = list(self._records.values())
+        return [r for r in records if now - r.last_seen <= max_age and (side is None or r.side == side)]
+
+    def strongest(self, n=1, max_age=None, side=None):
+        """Returns up to n records with the best smoothed RSSI, strongest first"""
+        records = [r for r in self.devices(max_age, side) if r.rssi is not None]
+        return sorted(records, key=lambda r: r.rssi, reverse=True)[:n]
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, device_id):
+        return self.get(device_id) is not None
+
+
+# Scan results of every scan in this process
+scan_registry = ScanRegistry()
+
+
 class DeviceNotFoundError(Exception):
     pass
 
@@ -147,39 +612,41 @@ class WirelessCommAdaptor(object):
         self.wireless_control = pm.GetWirelessControl()
         self.wireless_control.SetCommunicationAdaptor(self.com_adaptor)
         self.device_info = None
-        _event_monitor.add_listener(self)
+        # Only events for this device are routed here
+        get_event_monitor().subscribe(self, device_id=self.device_id)
 
     def connect(self, timeout=10.0):
         if self.state != sd.kDisconnected:
             raise InvalidStateError(f"Device must be disconnected before attempting to connect")
 
-        self.event.clear()
-        logger.debug(f"Connecting to device {self.device_id}")
-        self.com_adaptor.Connect()
-        if not self.event.wait(timeout):
-            raise RuntimeError(f"Failed to connect to device {self.device_id}")
-
-        if self.is_rsl10:
-            # !!! Work around firmware bug !!!
-            logger.debug("Disconnecting and re-connecting due to firmware issue...")
-            self.com_adaptor.Disconnect()
+        with sd_sdk_trace.span('WirelessCommAdaptor.connect', device=self.device_id):
             self.event.clear()
-            self.com_adaptor.Connect()
+            logger.debug(f"Connecting to device {self.device_id}")
+            timed_call('Connect', self.com_adaptor.Connect, device=self.device_id)
             if not self.event.wait(timeout):
                 raise RuntimeError(f"Failed to connect to device {self.device_id}")
-            # !!! Work around firmware bug !!!
 
-        # Connection successful
-        assert self.state == sd.kConnected
-        self.com_adaptor.VerifyNvmWrites = True
-        self.device_info = DeviceInfo(self.com_adaptor.DetectDevice())
-        logger.debug(f"Connected to device {self.device_id}!")
+            if self.is_rsl10:
+                # !!! Work around firmware bug !!!
+                logger.debug("Disconnecting and re-connecting due to firmware issue...")
+                timed_call('Disconnect', self.com_adaptor.Disconnect, device=self.device_id)
+                self.event.clear()
+                timed_call('Connect', self.com_adaptor.Connect, device=self.device_id)
+                if not self.event.wait(timeout):
+                    raise RuntimeError(f"Failed to connect to device {self.device_id}")
+                # !!! Work around firmware bug !!!
+
+            # Connection successful
+            assert self.state == sd.kConnected
+            self.com_adaptor.VerifyNvmWrites = True
+            self.device_info = DeviceInfo(timed_call('DetectDevice', self.com_adaptor.DetectDevice, device=self.device_id))
+            logger.debug(f"Connected to device {self.device_id}!")
 
     def disconnect(self, timeout=5.0):
         self.event.clear()
         if self.state == sd.kConnected:
             self.state = sd.kDisconnecting
-            self.com_adaptor.Disconnect()
+            timed_call('Disconnect', self.com_adaptor.Disconnect, device=self.device_id)
             if not self.event.wait(timeout):
                 raise RuntimeError(f"Failed to disconnect from device {self.device_id}")
         self.device_info = None
@@ -212,17 +679,185 @@ class WirelessCommAdaptor(object):
         self.disconnect()
         self.com_adaptor.CloseDevice()
 
-    def __del__(self,):
-        if _event_monitor is not None:
-            _event_monitor.remove_listener(self)
+    def __getattr__(self, attr):
+        # Only called for attributes that don't exist here: look them up in
+        # the underlying com_adaptor. Methods are cached on the instance so
+        # later lookups take the normal attribute path; other values (e.g.
+        # properties of the interface) are read through every time.
+        if attr == 'com_adaptor' or attr.startswith('__'):
+            raise AttributeError(attr)
+        value = getattr(self.com_adaptor, attr)
+        if callable(value):
+            self.__dict__[attr] = value
+        return value
+
+
+class WirelessScan(object):
+    """
+    A scan for wireless devices whose results can be consumed as they
+    arrive, either as a generator or as an async iterator:
+
+        with WirelessScan(sd.kRSL10, com_port, timeout=5.0) as scan:
+            for scan_event in scan:
+                ...
+
+        async for scan_event in WirelessScan(sd.kRSL10, com_port, max_results=1,
+                                             predicate=lambda e: e['DeviceID'] == device_id):
+            ...
+
+    Waiting blocks on the scan events themselves rather than polling. The
+    scan is started on first iteration (or on __enter__) and
+    EndScanForWirelessDevices is called exactly once, however iteration ends
+    (exhausted, timeout, break, exception or generator close). The value it
+    returns is kept in 'results'.
+
+    wireless_programmer_type    One of kRSL10 or kNoahlinkWireless
+
+    com_port                    Only used with RSL10 programmers
+
+    side                        Only used with NOAHLink Wireless programmers
+
+    clear_bond_table            If True, clear the bond table in the wireless programmer
+
+    timeout                     Number of seconds after the start of the scan to stop
+                                iterating. If not specified, scans until stopped.
+
+    predicate                   If given, only scan events for which predicate(event)
+                                is true are yielded (and counted in max_results)
+
+    max_results                 Stop after yielding this many scan events
+    """
+    def __init__(self, wireless_programmer_type, com_port="", side=sd.kLeft, clear_bond_table=False,
+                 timeout=None, predicate=None, max_results=None):
+        self.wireless_programmer_type = wireless_programmer_type
+        self.com_port = com_port
+        self.side = side
+        self.clear_bond_table = clear_bond_table
+        self.timeout = timeout
+        self.predicate = predicate
+        self.max_results = max_results
+        self.results = None
+        self.yielded = 0
+        self._queue = queue.Queue()
+        self._handler = None
+        self._async_result = None
+        self._deadline = None
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._loop = None
+        self._wakeup = None
+
+    def _on_scan_event(self, event_data):
+        # Called on an event dispatch thread
+        self._queue.put(event_data)
+        self._wake()
+
+    def _wake(self):
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # The event loop was closed
+                pass
+
+    def start(self):
+        with self._lock:
+            if self._handler is not None or self._stopped:
+                return
+            self._handler = ScanResultHandler(self._on_scan_event)
+            if self.timeout is not None:
+                self._deadline = time.monotonic() + self.timeout
+            self._async_result = get_product_manager().BeginScanForWirelessDevices(
+                self.wireless_programmer_type, self.com_port, self.side, "", self.clear_bond_table)
+
+    def stop(self):
+        """Ends the scan (if it was started) and returns the SDK's scan results"""
+        with self._lock:
+            if self._stopped:
+                return self.results
+            self._stopped = True
+            # Wake an iterator blocked on another thread
+            self._queue.put(_STOP)
+            self._wake()
+            if self._handler is None:
+                return None
+            self._handler.listen_for_events(False)
+            self.results = get_product_manager().EndScanForWirelessDevices(self._async_result)
+            return self.results
+
+    def _remaining(self):
+        if self._deadline is None:
+            return None
+        return max(self._deadline - time.monotonic(), 0.0)
+
+    def _accept(self, event_data):
+        if self.predicate is not None and not self.predicate(event_data):
+            return False
+        self.yielded += 1
+        return True
+
+    def _finished(self):
+        return self._stopped or (self.max_results is not None and self.yielded >= self.max_results)
+
+    def __iter__(self):
+        self.start()
+        try:
+            while not self._finished():
+                remaining = self._remaining()
+                if remaining is not None and remaining <= 0:
+                    logger.debug(f"Scan timed out after {self.timeout} seconds")
+                    return
+                try:
+                    event_data = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if event_data is _STOP:
+                    return
+                if self._accept(event_data):
+                    yield event_data
+        finally:
+            self.stop()
 
-    def __getattribute__(self, attr):
-        # If a method doesn't exist here, try to find it in
-        # the underlying com_adaptor.
+    async def _aiter(self):
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self.start()
         try:
-            return object.__getattribute__(self, attr)
-        except AttributeError:
-            return object.__getattribute__(self, 'com_adaptor').__getattribute__(attr)
+            while not self._finished():
+                try:
+                    event_data = self._queue.get_nowait()
+                except queue.Empty:
+                    remaining = self._remaining()
+                    if remaining is not None and remaining <= 0:
+                        logger.debug(f"Scan timed out after {self.timeout} seconds")
+                        return
+                    self._wakeup.clear()
+                    if self._queue.empty():
+                        try:
+                            await asyncio.wait_for(self._wakeup.wait(), remaining)
+                        except asyncio.TimeoutError:
+                            pass
+                    continue
+                if event_data is _STOP:
+                    return
+                if self._accept(event_data):
+                    yield event_data
+        finally:
+            loop = self._loop
+            self._loop = None
+            # EndScanForWirelessDevices blocks, so keep it off the event loop
+            await loop.run_in_executor(None, self.stop)
+
+    def __aiter__(self):
+        return self._aiter()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
 
 
 def scan_for_devices(wireless_programmer_type,
@@ -249,42 +884,15 @@ def scan_for_devices(wireless_programmer_type,
     timeout                     Number of seconds to scan for before returning all scan
                                 results. If not specified, scans forever (or until
                                 scan_event_cb returns False).
+
+    See WirelessScan to consume scan events as a generator or async iterator.
     """
-    pm = get_product_manager()
-
-    class DummyScanResultHandler:
-        def __init__(self, *args, **kwargs) -> None:
-            pass
-        def __enter__(self):
-            return self
-        def __exit__(self, exc_type, exc_val, exc_tb):
-            pass
-
-    _scanner_obj = DummyScanResultHandler
-    if callable(scan_event_cb):
-        _scanner_obj = ScanResultHandler
-
-    scanning = True
-    def _cb(*args, **kwargs):
-        nonlocal scanning
-        scanning = scan_event_cb(*args, **kwargs)
-
-    scan_results = None
-    with _scanner_obj(_cb) as scanner:
-        _res = pm.BeginScanForWirelessDevices(wireless_programmer_type, com_port, side, "", clear_bond_table)
-        start = time.time()
-        try:
-            while scanning:
-                if timeout is not None:
-                    if time.time() - start > timeout:
-                        raise TimeoutError("Scan timeout")
-                time.sleep(0.001)
-        except TimeoutError:
-            logger.debug(f"Scan timed out after {timeout} seconds")
-        finally:
-            scan_results = pm.EndScanForWirelessDevices(_res)
+    with WirelessScan(wireless_programmer_type, com_port, side, clear_bond_table, timeout=timeout) as scan:
+        for scan_event in scan:
+            if callable(scan_event_cb) and not scan_event_cb(scan_event):
+                break
 
-    return scan_results
+    return scan.results
 
 
 def scan_for_and_connect_to_device(device_id,
@@ -293,7 +901,8 @@ def scan_for_and_connect_to_device(device_id,
                                    side=sd.kLeft,
                                    clear_bond_table=False,
                                    timeout=None,
-                                   event_cb=None):
+                                   event_cb=None,
+                                   max_scan_age=None):
     """
     Scans for and connected to a specific wireless device.
 
@@ -312,9 +921,18 @@ def scan_for_and_connect_to_device(device_id,
                                 is found).
 
     event_cb                    Optional callback to call on SDK events
+
+    max_scan_age                If given, skip scanning when the device was seen by any
+                                scan in this process within this many seconds (see
+                                scan_registry)
     """
 
     result = None
+    if max_scan_age is not None:
+        record = scan_registry.get(device_id, max_age=max_scan_age)
+        if record is not None:
+            logger.debug(f"Device ID {device_id} seen {record.age():.1f} seconds ago, not scanning")
+            result = record.data
 
     def _on_scan_result(scan_result):
         nonlocal result
@@ -324,9 +942,10 @@ def scan_for_and_connect_to_device(device_id,
         # Scan until device is found
         return result is None
 
-    scan_for_devices(wireless_programmer_type, com_port=com_port, side=side,
-                     clear_bond_table=clear_bond_table, scan_event_cb=_on_scan_result,
-                     timeout=timeout)
+    if result is None:
+        scan_for_devices(wireless_programmer_type, com_port=com_port, side=side,
+                         clear_bond_table=clear_bond_table, scan_event_cb=_on_scan_result,
+                         timeout=timeout)
 
     if not result:
         raise DeviceNotFoundError(f"Failed to find device with ID {device_id}")
@@ -356,3 +975,248 @@ def connect_to_device(device_id,
     adaptor = WirelessCommAdaptor(device_id, is_rsl10=wireless_programmer_type is sd.kRSL10, on_event=event_cb)
     adaptor.connect(timeout=timeout)
     return adaptor
+
+
+@dataclass
+class ConnectionPoolStats:
+    # acquire() handed out an already connected adaptor
+    hits: int = 0
+    # acquire() had to connect
+    misses: int = 0
+    # Pooled adaptors found disconnected when re-validated
+    stale: int = 0
+    # Adaptors closed because they were idle too long or to make room
+    evictions: int = 0
+
+
+class _PooledConnection(object):
+    __slots__ = ('adaptor', 'in_use', 'last_used')
+
+    def __init__(self):
+        self.adaptor = None
+        self.in_use = True
+        self.last_used = time.monotonic()
+
+
+class WirelessConnectionPool(object):
+    """
+    Keeps wireless connections open between uses so that the same device is
+    not connected to (and detected) again for every operation:
+
+        pool = WirelessConnectionPool(sd.kRSL10, max_connections=4, idle_timeout=30.0)
+        with pool.connection(device_id) as adaptor:
+            ...
+
+    A device's adaptor is handed to one user at a time. Before it is handed
+    out again it is re-validated by its connection state (no device
+    traffic); adaptors that have dropped are replaced. Adaptors not used for
+    'idle_timeout' seconds are closed by a background thread, and at most
+    'max_connections' are kept open: the least recently used idle adaptor
+    is closed to make room, and if every adaptor is in use acquire() waits
+    up to 'wait_timeout' seconds for one to be released. The background
+    thread only holds a weak reference to the pool, but idle adaptors are
+    only closed by close() (or at the end of a with block).
+
+    wireless_programmer_type    One of kRSL10 or kNoahlinkWireless
+
+    connect                     Callable(device_id) returning a connected adaptor (default:
+                                connect_to_device with connect_timeout)
+    """
+    def __init__(self, wireless_programmer_type, max_connections=4, idle_timeout=60.0,
+                 connect_timeout=10.0, wait_timeout=30.0, connect=None):
+        self.wireless_programmer_type = wireless_programmer_type
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.wait_timeout = wait_timeout
+        self.connect = connect if connect is not None else self._connect
+        self.stats = ConnectionPoolStats()
+        # device_id: _PooledConnection, least recently used first
+        self._connections = collections.OrderedDict()
+        self._condition = threading.Condition()
+        self._closed = threading.Event()
+        self._reaper = None
+        if idle_timeout is not None:
+            self._reaper = threading.Thread(target=self._reap, name="WirelessConnectionPool", daemon=True,
+                                            args=(weakref.ref(self), self._closed, max(idle_timeout / 2, 0.01)))
+            self._reaper.start()
+
+    def _connect(self, device_id):
+        return connect_to_device(device_id, self.wireless_programmer_type, timeout=self.connect_timeout)
+
+    @staticmethod
+    def _is_healthy(adaptor):
+        return getattr(adaptor, 'state', sd.kConnected) == sd.kConnected
+
+    @staticmethod
+    def _close_adaptor(device_id, adaptor):
+        try:
+            adaptor.close()
+        except Exception as e:
+            logger.warning(f"Failed to close connection to device {device_id}: {e!r}")
+
+    def _make_room(self, deadline, to_close):
+        # Called with the condition held. Removes idle adaptors (least
+        # recently used first, adding them to to_close) until there is room,
+        # or else waits once for a connection to be released. The condition
+        # is released while waiting, so the caller must look again.
+        while len(self._connections) >= self.max_connections:
+            idle = next(((k, c) for k, c in self._connections.items() if not c.in_use), None)
+            if idle is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._closed.is_set():
+                    raise RuntimeError(f"All {self.max_connections} pooled connections are in use")
+                self._condition.wait(remaining)
+                return
+            device_id, conn = idle
+            del self._connections[device_id]
+            self.stats.evictions += 1
+            to_close.append((device_id, conn.adaptor))
+
+    def acquire(self, device_id):
+        """
+        Returns a connected adaptor for device_id, reusing a pooled one if it
+        is still connected. Give it back with release() (or use connection()).
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        to_close = []
+        try:
+            with self._condition:
+                while True:
+                    if self._closed.is_set():
+                        raise InvalidStateError("The connection pool is closed")
+                    conn = self._connections.get(device_id)
+                    if conn is None:
+                        if len(self._connections) >= self.max_connections:
+                            # May wait, during which another thread can add
+                            # this device: look again
+                            self._make_room(deadline, to_close)
+                            continue
+                        conn = self._connections[device_id] = _PooledConnection()
+                        break
+                    if not conn.in_use:
+                        conn.in_use = True
+                        self._connections.move_to_end(device_id)
+                        break
+                    # In use elsewhere (or being connected): wait for it
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RuntimeError(f"Connection to device {device_id} is in use")
+                    self._condition.wait(remaining)
+        finally:
+            for args in to_close:
+                self._close_adaptor(*args)
+
+        adaptor = conn.adaptor
+        if adaptor is not None:
+            if self._is_healthy(adaptor):
+                with self._condition:
+                    self.stats.hits += 1
+                return adaptor
+            logger.debug(f"Pooled connection to device {device_id} dropped, reconnecting")
+            with self._condition:
+                self.stats.stale += 1
+            self._close_adaptor(device_id, adaptor)
+            conn.adaptor = None
+
+        with self._condition:
+            self.stats.misses += 1
+        try:
+            conn.adaptor = self.connect(device_id)
+        except BaseException:
+            with self._condition:
+                self._connections.pop(device_id, None)
+                self._condition.notify_all()
+            raise
+        return conn.adaptor
+
+    def release(self, adaptor):
+        """Returns an adaptor obtained from acquire() to the pool"""
+        with self._condition:
+            conn = self._connections.get(adaptor.device_id)
+            if conn is None or conn.adaptor is not adaptor:
+                conn = None
+            elif self._closed.is_set():
+                del self._connections[adaptor.device_id]
+                conn = None
+            else:
+                conn.in_use = False
+                conn.last_used = time.monotonic()
+                self._condition.notify_all()
+        if conn is None:
+            # Not (or no longer) pooled
+            self._close_adaptor(adaptor.device_id, adaptor)
+
+    def discard(self, adaptor):
+        """Closes an adaptor obtained from acquire() instead of returning it to the pool"""
+        with self._condition:
+            conn = self._connections.get(adaptor.device_id)
+            if conn is not None and conn.adaptor is adaptor:
+                del self._connections[adaptor.device_id]
+                self._condition.notify_all()
+        self._close_adaptor(adaptor.device_id, adaptor)
+
+    @contextlib.contextmanager
+    def connection(self, device_id):
+        """
+        Acquires the adaptor of device_id for the duration of a with block.
+        It is discarded rather than pooled if the block raises.
+        """
+        adaptor = self.acquire(device_id)
+        try:
+            yield adaptor
+        except BaseException:
+            self.discard(adaptor)
+            raise
+        self.release(adaptor)
+
+    def evict_idle(self, now=None):
+        """Closes adaptors that have been idle for more than idle_timeout. Returns the number closed."""
+        if self.idle_timeout is None:
+            return 0
+        now = time.monotonic() if now is None else now
+        with self._condition:
+            expired = [(k, c.adaptor) for k, c in self._connections.items()
+                       if not c.in_use and now - c.last_used > self.idle_timeout]
+            for device_id, _ in expired:
+                del self._connections[device_id]
+            self.stats.evictions += len(expired)
+            if expired:
+                self._condition.notify_all()
+        for args in expired:
+            self._close_adaptor(*args)
+        return len(expired)
+
+    @staticmethod
+    def _reap(pool_ref, closed, interval):
+        # Holds the pool only between waits, so that a pool dropped without
+        # close() can still be collected (which ends this thread)
+        while not closed.wait(interval):
+            pool = pool_ref()
+            if pool is None:
+                return
+            pool.evict_idle()
+            del pool
+
+    def close(self):
+        """Closes every idle adaptor and stops pooling. Adaptors in use are closed when released."""
+        self._closed.set()
+        with self._condition:
+            idle = [(k, c.adaptor) for k, c in self._connections.items() if not c.in_use]
+            for device_id, _ in idle:
+                del self._connections[device_id]
+            self._condition.notify_all()
+        for args in idle:
+            self._close_adaptor(*args)
+
+    def __len__(self):
+        return len(self._connections)
+
+    def __contains__(self, device_id):
+        return device_id in self._connections
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
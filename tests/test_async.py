@@ -0,0 +1,92 @@
+import pytest
+import time
+from concurrent.futures import CancelledError
+
+from sd_sdk_python.sd_sdk_async import SDKFuture, as_completed, wait_all
+from sd_sdk_python.sd_sdk import wait_for_async
+
+
+class TimedAsyncResult:
+    """Behaves like an SDK AsyncResult that finishes after 'duration' seconds"""
+    def __init__(self, duration, result=None, error=None):
+        self.start = time.monotonic()
+        self.duration = duration
+        self.result = result
+        self.error = error
+
+    @property
+    def IsFinished(self):
+        return time.monotonic() - self.start >= self.duration
+
+    def GetProgressValue(self):
+        return min(int(100 * (time.monotonic() - self.start) / self.duration), 100)
+
+    def GetResult(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_future_result():
+    progress = []
+    future = SDKFuture(TimedAsyncResult(0.02, result=42), on_progress=lambda f, p: progress.append(p))
+    assert not future.done()
+    assert future.result(timeout=1.0) == 42
+    assert future.done() and progress
+
+
+def test_future_timeout_and_cancel():
+    future = SDKFuture(TimedAsyncResult(10.0))
+    with pytest.raises(TimeoutError):
+        future.result(timeout=0.01)
+    called = []
+    future.add_done_callback(called.append)
+    assert future.cancel()
+    assert future.cancelled() and called == [future]
+    with pytest.raises(CancelledError):
+        future.result()
+
+
+def test_future_exception():
+    future = SDKFuture(TimedAsyncResult(0.0, error=ValueError("E_FAILED")))
+    assert isinstance(future.exception(), ValueError)
+
+
+def test_as_completed_and_wait_all():
+    futures = [SDKFuture(TimedAsyncResult(d, result=d)) for d in (0.06, 0.0, 0.03)]
+    assert [f.result() for f in as_completed(futures, timeout=1.0)] == [0.0, 0.03, 0.06]
+    assert wait_all(futures) == [0.06, 0.0, 0.03]
+    with pytest.raises(TimeoutError):
+        list(as_completed([SDKFuture(TimedAsyncResult(10.0))], timeout=0.01))
+
+
+def test_wait_for_async():
+    assert wait_for_async(TimedAsyncResult(0.01, result='done')) == 'done'
+    with pytest.raises(RuntimeError):
+        wait_for_async(TimedAsyncResult(10.0), timeout_seconds=0.01)
+
+
+def test_begin_load_param_file_keeps_dirty_on_failure():
+    import types
+    from sd_sdk_python.sd_sdk import Ezairo
+
+    class Product:
+        def __init__(self, async_result):
+            self.async_result = async_result
+
+        def BeginLoadParamFile(self, *args):
+            return self.async_result
+
+    sd = types.SimpleNamespace(DeviceInfo=object)
+    device = Ezairo(sd, None, None, Product(TimedAsyncResult(0.0, error=RuntimeError("E_FAILED"))))
+    device._dirty.add('system')
+    assert isinstance(device.begin_load_param_file('test.param').exception(), RuntimeError)
+    assert device._dirty == {'system'}
+
+    device.product = Product(TimedAsyncResult(10.0))
+    device.begin_load_param_file('test.param').cancel()
+    assert device._dirty == {'system'}
+
+    device.product = Product(TimedAsyncResult(0.0, result=True))
+    device.begin_load_param_file('test.param').wait()
+    assert device._dirty == set()
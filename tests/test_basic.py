@@ -11,3 +11,15 @@ def test_product_manager(sd, product_manager):
 
 def test_product_memories(product):
     assert len(product.Memories) == 8
+
+
+def test_import_is_lazy():
+    # Importing the package (or the pure Python helpers) must not resolve the
+    # SDK or create the ProductManager
+    import subprocess
+    import sys
+    code = ("import sys, sd_sdk_python, sd_sdk_python.sd_sdk; "
+            "assert 'sd' not in sys.modules; "
+            "assert sd_sdk_python._pm is None; "
+            "assert sd_sdk_python.get_startup_timings() == {}")
+    subprocess.run([sys.executable, '-c', code], check=True)
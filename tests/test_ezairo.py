@@ -0,0 +1,72 @@
+import types
+
+import pytest
+
+from sd_sdk_python.sd_sdk import Ezairo
+
+
+def test_failed_load_param_file_invalidates_the_shadow():
+    class Product:
+        def LoadParamFile(self, *args):
+            raise RuntimeError("E_PARAM_FILE")
+
+    device = Ezairo(types.SimpleNamespace(DeviceInfo=object), object(), None, Product(), shadow_nvm=True)
+    device._coherent.update({'system', 0})
+    device._dirty.add(1)
+    with pytest.raises(RuntimeError):
+        device.load_param_file('test.param')
+    # Nothing is assumed to match NVM any more, and unburned changes stay dirty
+    assert device._coherent == set() and device._dirty == {1}
+
+
+def test_apply_snapshot_writes_unburned_memories():
+    sd = types.SimpleNamespace(DeviceInfo=object, kSystemNvmMemory=9)
+    layout = types.SimpleNamespace(memories={9: (), 0: (), 1: ()})
+
+    class Snapshot:
+        def __init__(self, delta):
+            self.layout = layout
+            self.delta = delta
+
+        def diff(self, other):
+            return dict(self.delta)
+
+    device = Ezairo(sd, object(), None, object())
+    written = []
+    device.set_many = lambda memory_values: written.append(memory_values) or list(memory_values)
+    device.snapshot = lambda: Snapshot({0: {'X_Mem0000': 1}})
+    # The system memory was edited on the host to what the target holds, but not burned
+    device._dirty.add('system')
+    assert device.apply_snapshot(Snapshot({})) == [0, 9]
+    assert written == [{0: {'X_Mem0000': 1}, 9: {}}]
+    # A snapshot read from the device is taken as is
+    assert device.apply_snapshot(Snapshot({}), current=Snapshot({})) == []
+
+
+@pytest.mark.parametrize('shadow_nvm', [False, True])
+def test_scratch_memory_is_only_cached_with_shadow_nvm(fake_product, shadow_nvm):
+    device = Ezairo(types.SimpleNamespace(DeviceInfo=object), object(), None, fake_product, shadow_nvm=shadow_nvm)
+    device.write_scratch_memory([1, 2])
+    # Another unit (or tool) changes the area behind this object's back
+    fake_product.data[:8] = bytes(8)
+    device.write_scratch_memory([1, 2])
+    assert fake_product.data[:8] == (bytes(8) if shadow_nvm else bytes.fromhex('0000000100000002'))
+
+    # The voice alert hash is read back from the device unless shadowed
+    assert device.write_voice_alert_data(b'alerts', hash_offset=32)
+    fake_product.data[32:40] = bytes(8)
+    assert device.write_voice_alert_data(b'alerts', hash_offset=32) is not shadow_nvm
+
+
+def test_read_scratch_memory_is_timed(fake_product):
+    from sd_sdk_python import sd_sdk_metrics as metrics
+    device = Ezairo(types.SimpleNamespace(DeviceInfo=object), object(), None, fake_product)
+    metrics.registry.reset()
+    metrics.enable()
+    try:
+        assert device.read_scratch_memory(offset=60) == bytes(range(60, 64))
+    finally:
+        metrics.disable()
+    operation = metrics.registry.snapshot()['operations']['ReadManufacturerData']
+    assert (operation['count'], operation['bytes']) == (1, 4)
+    metrics.registry.reset()
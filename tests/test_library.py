@@ -0,0 +1,21 @@
+def test_library_cache_reloads_changed_file(tmp_path):
+    import os
+    from sd_sdk_python.sd_sdk_library import LibraryCache
+
+    class ProductManager:
+        def LoadLibraryFromFile(self, path):
+            with open(path) as f:
+                return f.read()
+
+    path = tmp_path / "product.library"
+    path.write_text("v1")
+    cache = LibraryCache(ProductManager())
+    assert cache.load(path) == "v1"
+    assert cache.load(str(path)) == "v1"
+    path.write_text("v22")
+    os.utime(path, ns=(0, 0))
+    assert cache.load(path) == "v22"
+    metrics = cache.metrics()[str(path)]
+    assert (metrics.loads, metrics.hits) == (2, 1)
+    cache.prewarm([path]).join()
+    assert cache.metrics()[str(path)].hits == 2
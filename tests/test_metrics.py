@@ -0,0 +1,22 @@
+import pytest
+
+
+def test_metrics_record_only_when_enabled():
+    from sd_sdk_python import sd_sdk_metrics as metrics
+    metrics.registry.reset()
+    assert metrics.timed_call('ReadParameters', max, 1, 2, memory=3, device='AA') == 2
+    assert metrics.registry.snapshot()['series'] == []
+    metrics.enable()
+    try:
+        metrics.timed_call('ReadParameters', max, 1, 2, memory=3, device='AA')
+        with pytest.raises(ZeroDivisionError):
+            metrics.timed_call('WriteVoiceAlert', divmod, 1, 0, device='AA', nbytes=100)
+    finally:
+        metrics.disable()
+    operations = metrics.registry.snapshot()['operations']
+    assert operations['ReadParameters']['count'] == 1
+    assert operations['WriteVoiceAlert']['errors'] == 1
+    assert operations['WriteVoiceAlert']['bytes'] == 100
+    text = metrics.registry.to_prometheus()
+    assert 'sd_sdk_call_seconds_count{operation="ReadParameters",memory="3",device="AA"} 1' in text
+    metrics.registry.reset()
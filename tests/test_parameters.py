@@ -21,6 +21,61 @@ def test_not_initialized_fail(sd, product):
     assert exc_info.type.__name__ == "DeviceError" and str(exc_info.value) == "E_NOT_INITIALIZED"
 
 
+def test_parameter_index(sd, Ezairo, product_library, product):
+    device = Ezairo(sd, None, None, product)
+    expected = [p.Id for p in product.SystemMemory.Parameters if p.Id.startswith('X_RF_DeviceName')]
+    assert len(expected) == 8
+    assert [p.Id for p in device.find_parameters_with_prefix(sd.kSystemNvmMemory, 'X_RF_DeviceName')] == expected
+    assert [p.Id for p in device.find_parameters_matching(sd.kSystemNvmMemory, 'X_RF_DeviceName?')] == expected
+    assert device.find_parameter(sd.kSystemNvmMemory, 'X_RF_DeviceName0').Id == 'X_RF_DeviceName0'
+    # The index is built once per memory and rebuilt for a different product
+    index = device.parameter_index(sd.kSystemNvmMemory)
+    assert device.parameter_index(sd.kSystemActiveMemory) is index
+    device.product = product_library.Products[0].CreateProduct()
+    assert device.parameter_index(sd.kSystemNvmMemory) is not index
+
+
+def test_parameter_accessor(sd, Ezairo, product):
+    device = Ezairo(sd, None, None, product)
+    param, attribute, memory_key = device.parameter_accessor(sd.kSystemNvmMemory, 'X_RF_DeviceName0')
+    assert param.Id == 'X_RF_DeviceName0' and attribute == 'Value' and memory_key == 'system'
+    assert device.parameter_accessor(sd.kSystemNvmMemory, 'X_RF_DeviceName0')[0] is param
+    device.set_parameter_value(sd.kSystemNvmMemory, 'X_RF_DeviceName0', 0x414243)
+    assert device.get_parameter_value(sd.kSystemNvmMemory, 'X_RF_DeviceName0') == 0x414243
+    assert device.dirty_memories() == [sd.kSystemNvmMemory]
+
+
+@pytest.mark.parametrize('format', ['text', 'jsonl', 'csv', 'binary'])
+def test_dump_parameters(sd, Ezairo, product, format):
+    import io
+    from sd_sdk_python import sd_sdk_dump
+    device = Ezairo(sd, None, None, product)
+    records = list(device.iter_parameters())
+    assert len(records) == len(product.SystemMemory.Parameters) + sum(len(m.Parameters) for m in product.Memories)
+    file_obj = io.BytesIO() if format == 'binary' else io.StringIO()
+    device.dump_parameters(file_obj, format=format)
+    if format == 'binary':
+        file_obj.seek(0)
+        assert list(sd_sdk_dump.read_binary(file_obj)) == records
+    elif format == 'text':
+        assert file_obj.getvalue().splitlines()[0] == "%s=%s" % (records[0].id, records[0].value)
+    # A subset of memories
+    assert {r.memory for r in device.iter_parameters([sd.kNvmMemory2])} == {sd.kNvmMemory2}
+
+
+def test_snapshot_diff(sd, Ezairo, product):
+    device = Ezairo(sd, None, None, product)
+    reference = device.snapshot()
+    assert reference.diff(device.snapshot()) == {}
+    value = device.get_parameter_value(sd.kSystemNvmMemory, 'X_RF_DeviceName0')
+    device.set_parameter_value(sd.kSystemNvmMemory, 'X_RF_DeviceName0', value ^ 1)
+    changed = device.snapshot()
+    assert changed.layout is reference.layout
+    assert reference.diff(changed) == {sd.kSystemNvmMemory: {'X_RF_DeviceName0': value ^ 1}}
+    assert changed.diff(reference) == {sd.kSystemNvmMemory: {'X_RF_DeviceName0': value}}
+    assert sorted(r.id for r in changed) == sorted(r.id for r in device.iter_parameters())
+
+
 # This allows you to override the fixture "programmer" and "side" with specific values
 # (Note: We use 0 instead of sd.kLeft because we don't have access to the sd module at
 #        test collection time.)
@@ -73,6 +128,18 @@ def test_load_param_file(sd, configured_device, param_file):
     configured_device.reset()
 
 
+@pytest.mark.parametrize('param_file', ['EC_Right.param'])
+@pytest.mark.needsprogrammer
+def test_load_param_file_only_differences(sd, configured_device, param_file):
+    from sd_sdk_python.sd_sdk_paramfile import ParamFileCache
+    param_path = pathlib.Path(__file__).parent.resolve() / param_file
+    cache = ParamFileCache()
+    # The first load is a full load; loading it again finds nothing to write
+    assert configured_device.load_param_file(param_path, only_differences=True, cache=cache) is None
+    assert configured_device.load_param_file(param_path, only_differences=True, cache=cache) == []
+    assert cache.stats.hits == 1
+
+
 @pytest.mark.skip
 @pytest.mark.needsprogrammer
 def test_load_param_file_async(sd, configured_device):
@@ -95,7 +162,7 @@ def test_load_param_file_async(sd, configured_device):
     configured_device.restore_all_parameters()
 
     _async = configured_device.product.BeginLoadParamFile(str(this_path / 'EC_Right.param'), True, True, True)
-    result = sd_sdk.wait_for_async(timeout_seconds=30.0)
+    result = sd_sdk.wait_for_async(_async, timeout_seconds=30.0)
 
     configured_device.unmute()
 
@@ -103,6 +170,35 @@ def test_load_param_file_async(sd, configured_device):
     configured_device.reset()
 
 
+@pytest.mark.needsprogrammer
+def test_burn_only_dirty_parameters(sd, synced_device):
+    assert synced_device.dirty_memories() == []
+    assert synced_device.burn_parameters() == {}
+    device_name0 = synced_device.get_global_parameter_in_RAM('X_RF_DeviceName0')
+    synced_device.set_parameter_value(sd.kSystemNvmMemory, 'X_RF_DeviceName0', device_name0)
+    assert synced_device.dirty_memories() == [sd.kSystemNvmMemory]
+    written = synced_device.burn_parameters()
+    assert list(written) == [sd.kSystemNvmMemory]
+    assert synced_device.dirty_memories() == []
+    assert len(synced_device.burn_parameters(force_all=True)) == 1 + len(synced_device.product.Memories)
+
+
+@pytest.mark.needsprogrammer
+def test_shadow_nvm_reads(sd, Ezairo, synced_device):
+    device = Ezairo(sd, synced_device.interface, synced_device.device_info, synced_device.product, shadow_nvm=True)
+    values = [device.get_global_parameter_in_EEPROM(f'X_RF_DeviceName{i}') for i in range(8)]
+    assert device.shadow_stats.misses == 1 and device.shadow_stats.hits == 7
+    assert values == read_device_name_parameters_from_RAM(device)
+    # Our own writes keep the shadow coherent
+    device.set_global_parameter_in_EEPROM('X_RF_DeviceName0', values[0])
+    assert device.get_global_parameter_in_EEPROM('X_RF_DeviceName0') == values[0]
+    assert device.shadow_stats.misses == 1
+    # Invalidating (as reset and load_param_file do) forces a device read
+    device.invalidate_shadow_cache()
+    device.get_global_parameter_in_EEPROM('X_RF_DeviceName0')
+    assert device.shadow_stats.misses == 2
+
+
 @pytest.mark.needsprogrammer
 def test_read_scratch_memory(sd, synced_device):
     data = synced_device.read_scratch_memory()
@@ -110,34 +206,31 @@ def test_read_scratch_memory(sd, synced_device):
 
 
 def read_gap_device_name_parameters_from_RAM(device):
-    gap_device_name0 = device.get_global_parameter_in_RAM('X_RF_GAPDeviceName0')
-    gap_device_name1 = device.get_global_parameter_in_RAM('X_RF_GAPDeviceName1')
-    gap_device_name2 = device.get_global_parameter_in_RAM('X_RF_GAPDeviceName2')
-    gap_device_name3 = device.get_global_parameter_in_RAM('X_RF_GAPDeviceName3')
-    gap_device_name4 = device.get_global_parameter_in_RAM('X_RF_GAPDeviceName4')
-    gap_device_name5 = device.get_global_parameter_in_RAM('X_RF_GAPDeviceName5')
-    gap_device_name6 = device.get_global_parameter_in_RAM('X_RF_GAPDeviceName6')
-    gap_device_name7 = device.get_global_parameter_in_RAM('X_RF_GAPDeviceName7')
-    return [gap_device_name0, gap_device_name1, gap_device_name2, gap_device_name3, gap_device_name4, gap_device_name5, gap_device_name6, gap_device_name7]
+    from sd_sdk_python.sd_sdk_fields import GAP_DEVICE_NAME
+    return device.read_field_parameters(GAP_DEVICE_NAME, device.sd.kSystemActiveMemory)
 
 def write_gap_device_name_parameters_in_RAM(device, new_parameters):
-    for i, param in enumerate(new_parameters):
-        device.set_global_parameter_in_EEPROM(f'X_RF_GAPDeviceName{i}', param)
+    values = {f'X_RF_GAPDeviceName{i}': param for i, param in enumerate(new_parameters)}
+    assert device.set_many({device.sd.kSystemNvmMemory: values}) == [device.sd.kSystemNvmMemory]
 
 def read_device_name_parameters_from_RAM(device):
-    device_name0 = device.get_global_parameter_in_RAM('X_RF_DeviceName0')
-    device_name1 = device.get_global_parameter_in_RAM('X_RF_DeviceName1')
-    device_name2 = device.get_global_parameter_in_RAM('X_RF_DeviceName2')
-    device_name3 = device.get_global_parameter_in_RAM('X_RF_DeviceName3')
-    device_name4 = device.get_global_parameter_in_RAM('X_RF_DeviceName4')
-    device_name5 = device.get_global_parameter_in_RAM('X_RF_DeviceName5')
-    device_name6 = device.get_global_parameter_in_RAM('X_RF_DeviceName6')
-    device_name7 = device.get_global_parameter_in_RAM('X_RF_DeviceName7')
-    return [device_name0, device_name1, device_name2, device_name3, device_name4, device_name5, device_name6, device_name7]
+    from sd_sdk_python.sd_sdk_fields import DEVICE_NAME
+    return device.read_field_parameters(DEVICE_NAME, device.sd.kSystemActiveMemory)
 
 def write_device_name_parameters_in_RAM(device, new_parameters):
-    for i, param in enumerate(new_parameters):
-        device.set_global_parameter_in_EEPROM(f'X_RF_DeviceName{i}', param)
+    with device.batch() as batch:
+        for i, param in enumerate(new_parameters):
+            batch.set_global_parameter_in_EEPROM(f'X_RF_DeviceName{i}', param)
+
+@pytest.mark.needsprogrammer
+def test_batch_discarded_on_error(synced_device):
+    original_parameters = read_device_name_parameters_from_RAM(synced_device)
+    with pytest.raises(ZeroDivisionError):
+        with synced_device.batch() as batch:
+            batch.set_global_parameter_in_RAM('X_RF_DeviceName0', original_parameters[0] ^ 1)
+            1 / 0
+    assert read_device_name_parameters_from_RAM(synced_device) == original_parameters
+
 
 @pytest.mark.needsprogrammer
 def test_set_device_name(synced_device):
@@ -224,3 +317,15 @@ def test_device_name_parameters(synced_device):
     name = 'abcdefghijklmnopqrstuv'
     encoded_parameters = synced_device.device_name_to_parameters(name)
     assert encoded_parameters == [6382179, 6579558, 6776937, 6974316, 7171695, 7369074, 7566453, 7733248]
+
+
+def test_packed_field_encode_many():
+    from sd_sdk_python.sd_sdk_fields import DEVICE_NAME, PackedField
+    names = ['HörgerätHörgerttää', 'abcdefghijklmnopqrstuv', '']
+    encoded = DEVICE_NAME.encode_many(names)
+    assert encoded == [DEVICE_NAME.encode(name) for name in names]
+    assert encoded[0] == [0x48c3b6, 0x726765, 0x72c3a4, 0x7448c3, 0xb67267, 0x657274, 0x74c3a4, 0x0]
+    assert [DEVICE_NAME.decode(e) for e in encoded] == ['HörgerätHörgerttä', 'abcdefghijklmnopqrstuv', '']
+    blob = PackedField('X_Blob', count=4, word_bytes=2, encoding=None)
+    assert blob.encode(b'\x01\x02\x03\x04\x05') == [0x0102, 0x0304, 0x0500, 0x0]
+    assert blob.decode([0x0102, 0x0304]) == b'\x01\x02\x03\x04'
@@ -0,0 +1,57 @@
+import os
+import types
+
+from sd_sdk_python import sd_sdk_paramfile
+from sd_sdk_python.sd_sdk_paramfile import ParamFileCache
+
+
+def product(library_id, product_id):
+    return types.SimpleNamespace(Definition=types.SimpleNamespace(LibraryId=library_id, ProductId=product_id))
+
+
+def test_digest_is_remembered_per_modification_time_and_size(tmp_path, monkeypatch):
+    hashed = []
+
+    def file_digest(path):
+        hashed.append(path)
+        return digest(path)
+
+    digest = sd_sdk_paramfile.file_digest
+    monkeypatch.setattr(sd_sdk_paramfile, 'file_digest', file_digest)
+    path = tmp_path / "EC.param"
+    path.write_bytes(b"v1")
+    os.utime(path, ns=(0, 1000))
+    cache = ParamFileCache()
+    first = cache.digest(path)
+    assert cache.digest(str(path)) == first and len(hashed) == 1
+    # An edit that keeps the modification time and size is not noticed
+    path.write_bytes(b"v2")
+    os.utime(path, ns=(0, 1000))
+    assert cache.digest(path) == first and len(hashed) == 1
+    os.utime(path, ns=(0, 2000))
+    assert cache.digest(path) != first and len(hashed) == 2
+    path.write_bytes(b"v22")
+    os.utime(path, ns=(0, 2000))
+    assert cache.digest(path) != first and len(hashed) == 3
+
+
+def test_key_includes_the_product_definition():
+    key = ParamFileCache.key(b'digest', product(1, 2))
+    assert key == ParamFileCache.key(b'digest', product(1, 2))
+    assert key != ParamFileCache.key(b'digest', product(1, 3))
+    assert key != ParamFileCache.key(b'digest', product(3, 2))
+    assert key != ParamFileCache.key(b'other', product(1, 2))
+
+
+def test_least_recently_used_snapshot_is_dropped():
+    cache = ParamFileCache(max_entries=2)
+    cache.put('a', 'A')
+    cache.put('b', 'B')
+    assert cache.get('a') == 'A'
+    cache.put('c', 'C')
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == ('A', 'C')
+    assert (cache.stats.hits, cache.stats.misses) == (3, 1)
+    cache.clear()
+    assert len(cache) == 0 and cache.get('a') is None and cache.stats.misses == 2
@@ -0,0 +1,15 @@
+def test_scratch_memory_writes_changed_words(fake_product):
+    from sd_sdk_python.sd_sdk_scratch import ScratchMemory
+    scratch = ScratchMemory(fake_product, length=32)
+    assert scratch[1] == 0x04050607
+    assert list(scratch[2:4]) == [0x08090a0b, 0x0c0d0e0f]
+    assert fake_product.calls == [('read', 4, 4), ('read', 8, 8)]
+    # Writing what is already there does nothing
+    scratch[1] = 0x04050607
+    assert scratch.flush() == []
+    scratch[1] = 0x04050600
+    scratch[3] = 0
+    scratch[7] = 0xdeadbeef
+    assert scratch.flush() == [(4, 12), (28, 4)]
+    assert fake_product.data[4:16] == bytes([4, 5, 6, 0, 8, 9, 10, 11, 0, 0, 0, 0])
+    assert fake_product.data[28:32] == bytes.fromhex('deadbeef')
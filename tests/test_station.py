@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from sd_sdk_python.sd_sdk_station import StationContext, StationJob, StationScheduler, StationSlot
+
+
+# Stand-ins for open_station and program_device. They are module-level so
+# that process workers can unpickle them.
+def open_fake_station(slot):
+    if slot.library == 'missing.library':
+        raise FileNotFoundError(slot.library)
+    return StationContext(None, None, None, slot)
+
+
+def program_fake_device(context, job, step):
+    step('detect')
+    time.sleep(0.01)
+    step('burn')
+    if job.tag == 'hang':
+        time.sleep(1.0)
+    elif job.tag == 'fail':
+        raise RuntimeError("burn failed")
+    else:
+        time.sleep(job.tag or 0.01)
+    return (context.slot.name, job.param_file)
+
+
+def slots(*names, library='fake.library'):
+    return [StationSlot('Fake', 0, library, name=name) for name in names]
+
+
+def scheduler(station_slots, **kwargs):
+    kwargs.setdefault('use_processes', False)
+    return StationScheduler(station_slots, open_station=open_fake_station, program=program_fake_device, **kwargs)
+
+
+def test_runs_jobs_on_every_slot():
+    with scheduler(slots('A', 'B')) as station:
+        report = station.run([StationJob(f'n{i}', tag=0.05) for i in range(6)] +
+                             [StationJob('f', tag='fail'), StationJob('b', slot='B')])
+    assert len(report.results) == 8
+    assert {r.slot for r in report.succeeded} == {'A', 'B'}
+    assert [r.job.param_file for r in report.failed] == ['f'] and 'burn failed' in report.failed[0].error
+    assert next(r for r in report.results if r.job.param_file == 'b').result == ('B', 'b')
+    # 7 units in about 0.25 s
+    assert report.units_per_hour > 7 * 3600 / 1.0
+    summary = report.step_summary()
+    assert summary['detect']['count'] == 8 and summary['burn']['count'] == 8
+    assert report.to_dict()['succeeded'] == 7
+
+
+def test_hung_thread_worker_is_retired():
+    with scheduler(slots('A', 'B'), step_timeout=0.3) as station:
+        first = station.run([StationJob('hung', tag='hang', slot='A'), StationJob('n0')])
+        assert [(r.job.param_file, r.ok) for r in first.results if r.slot == 'A'] == [('hung', False)]
+        assert 'burn took longer than 0.3s' in first.failed[0].error
+        # The hung step returns during this run; neither its result nor the
+        # retired slot may show up in it
+        second = station.run([StationJob(f'n{i}', tag=0.2) for i in range(1, 7)])
+        assert sorted(r.job.param_file for r in second.results) == [f'n{i}' for i in range(1, 7)]
+        assert all(r.ok and r.slot == 'B' for r in second.results)
+        assert station._workers[0].state == 'dead'
+
+
+def test_slot_that_fails_to_open():
+    with scheduler(slots('A') + slots('B', library='missing.library')) as station:
+        report = station.run([StationJob('a'), StationJob('b', slot='B')])
+    assert [r.ok for r in report.results] == [True, False]
+    assert 'No slot available' in report.failed[0].error
+
+
+def test_hung_process_worker_is_restarted():
+    with scheduler(slots('A'), step_timeout=0.5, use_processes=True) as station:
+        report = station.run([StationJob('hung', tag='hang'), StationJob('next')])
+    assert [(r.job.param_file, r.ok) for r in report.results] == [('hung', False), ('next', True)]
+    assert 'TimeoutError' in report.results[0].error
+    assert report.results[1].result == ('A', 'next')
@@ -0,0 +1,19 @@
+def test_trace_chrome_export():
+    from sd_sdk_python import sd_sdk_trace as trace
+    from sd_sdk_python.sd_sdk_metrics import timed_call
+    trace.clear()
+    timed_call('ReadParameters', max, 1, 2, memory=3, device='AA')
+    assert trace.spans() == []
+    trace.enable(capacity=2)
+    try:
+        for memory in range(3):
+            timed_call('ReadParameters', max, 1, 2, memory=memory, device='AA')
+        trace.instant('event 1', device='AA')
+    finally:
+        trace.disable()
+    # Only the most recent spans are kept
+    assert [(s.name, s.memory) for s in trace.spans()] == [('ReadParameters', 2), ('event 1', None)]
+    events = [e for e in trace.to_chrome_trace()['traceEvents'] if e['ph'] != 'M']
+    assert [e['ph'] for e in events] == ['X', 'i']
+    assert events[0]['args'] == {'device': 'AA', 'memory': 2}
+    trace.clear()
@@ -0,0 +1,16 @@
+def test_voice_alert_sources_hash_alike(tmp_path):
+    import mmap
+    from sd_sdk_python.sd_sdk_voice import open_voice_alerts, content_hash, HASH_SIZE
+    data = bytes(range(256)) * 1000
+    path = tmp_path / "voice_alerts.bin"
+    path.write_bytes(data)
+    digests = []
+    for source in (data, bytearray(data), memoryview(data), path, str(path)):
+        with open_voice_alerts(source) as view:
+            assert len(view) == len(data)
+            digests.append(content_hash(view, chunk_size=4096))
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with open_voice_alerts(mapped) as view:
+            digests.append(content_hash(view))
+    assert len(digests[0]) == HASH_SIZE
+    assert len(set(digests)) == 1
@@ -0,0 +1,502 @@
+import gc
+import importlib
+import pathlib
+import sys
+import threading
+
+import pytest
+
+# The stand-in 'sd' module used by the benchmarks; it provides just enough
+# of the SDK's event handler and wireless interfaces to run these tests
+# without the SDK or a programmer.
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / 'benchmarks'))
+import standin_sd  # noqa: E402
+
+WIRELESS_MODULE = 'sd_sdk_python.sd_sdk_wireless'
+
+
+@pytest.fixture(scope="module")
+def wireless():
+    # Imports sd_sdk_wireless against the stand-in, then puts back whatever
+    # SDK (and wireless module) was there before for the other tests
+    import sd_sdk_python
+    missing = object()
+    saved = {name: sd_sdk_python.__dict__.get(name, missing) for name in ('sd', '_pm', 'sd_sdk_wireless')}
+    saved_module = sys.modules.pop(WIRELESS_MODULE, None)
+    standin_sd.install()
+    try:
+        yield importlib.import_module(WIRELESS_MODULE)
+    finally:
+        sys.modules.pop(WIRELESS_MODULE, None)
+        if saved_module is not None:
+            sys.modules[WIRELESS_MODULE] = saved_module
+        for name, value in saved.items():
+            if value is missing:
+                sd_sdk_python.__dict__.pop(name, None)
+            else:
+                setattr(sd_sdk_python, name, value)
+
+
+@pytest.fixture
+def pm(wireless):
+    # A fresh stand-in ProductManager (and so event handler and event
+    # monitor) for every test
+    import sd_sdk_python
+    sd_sdk_python._pm = standin_sd.ProductManager()
+    wireless._event_monitor = None
+    wireless.scan_registry.clear()
+    yield sd_sdk_python._pm
+    wireless._event_monitor = None
+
+
+def test_collected_listeners_unsubscribe_without_deadlock(wireless, pm):
+    class Cyclic(wireless.SDKEventHandler):
+        def __init__(self):
+            self.cycle = self
+
+    monitor = wireless.SDKEventMonitor(workers=1)
+
+    def subscribe_many():
+        for _ in range(2000):
+            monitor.subscribe(Cyclic())
+
+    thread = threading.Thread(target=subscribe_many, daemon=True)
+    threshold = gc.get_threshold()
+    # Collect cycles (and so run weak reference callbacks) at almost every
+    # allocation, including inside subscribe()
+    gc.set_threshold(5)
+    try:
+        thread.start()
+        thread.join(10.0)
+    finally:
+        gc.set_threshold(*threshold)
+    assert not thread.is_alive()
+    gc.collect()
+    monitor.notify(standin_sd.kScanEvent, {'DeviceID': 'A'})
+    assert monitor._subscriptions == {} and monitor._routes == {}
+
+
+class Recorder(object):
+    """A listener recording the events it is given, optionally holding up delivery until 'gate' is set"""
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.events = []
+        self.entered = threading.Event()
+        self._received = threading.Condition()
+
+    def notify(self, event_type, event_data):
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(10.0)
+        with self._received:
+            self.events.append((event_type, dict(event_data)))
+            self._received.notify_all()
+
+    def wait_for(self, count, timeout=5.0):
+        with self._received:
+            return self._received.wait_for(lambda: len(self.events) >= count, timeout)
+
+
+def scan(device_id, rssi=-60):
+    return {'DeviceID': device_id, 'RSSI': rssi}
+
+
+def test_listeners_see_their_events_in_order(wireless, pm):
+    monitor = wireless.SDKEventMonitor(queue_size=1000, workers=4)
+    recorders = [Recorder(), Recorder()]
+    for recorder in recorders:
+        monitor.subscribe(recorder)
+    for i in range(300):
+        monitor.notify(standin_sd.kScanEvent, scan('A', i))
+    for recorder in recorders:
+        assert recorder.wait_for(300)
+        assert [data['RSSI'] for _, data in recorder.events] == list(range(300))
+
+
+def test_overflow_drop_oldest(wireless, pm):
+    monitor = wireless.SDKEventMonitor(queue_size=3, overflow='drop_oldest', workers=1)
+    gate = threading.Event()
+    recorder = Recorder(gate)
+    monitor.subscribe(recorder)
+    monitor.notify(standin_sd.kScanEvent, scan('A', 0))
+    # The first event is being delivered, the next ones queue up behind it
+    assert recorder.entered.wait(5.0)
+    for i in range(1, 6):
+        monitor.notify(standin_sd.kScanEvent, scan('A', i))
+    assert monitor.stats()['queue_depth'] == 3
+    gate.set()
+    assert recorder.wait_for(4)
+    assert [data['RSSI'] for _, data in recorder.events] == [0, 3, 4, 5]
+    stats = monitor.stats()
+    assert stats['dropped'] == 2 and stats['delivered'] == 4 and stats['max_queue_depth'] == 3
+
+
+def test_overflow_coalesce_scans(wireless, pm):
+    monitor = wireless.SDKEventMonitor(queue_size=3, overflow='coalesce_scans', workers=1)
+    gate = threading.Event()
+    recorder = Recorder(gate)
+    monitor.subscribe(recorder)
+    monitor.notify(standin_sd.kScanEvent, scan('first'))
+    assert recorder.entered.wait(5.0)
+    for device_id in 'ABC':
+        monitor.notify(standin_sd.kScanEvent, scan(device_id))
+    # A newer scan of a queued device replaces it in place...
+    monitor.notify(standin_sd.kScanEvent, scan('A', -40))
+    # ...and other events drop the oldest
+    monitor.notify(standin_sd.kConnectionEvent, {'DeviceID': 'C', 'ConnectionState': '2'})
+    gate.set()
+    assert recorder.wait_for(4)
+    assert [(t, data['DeviceID']) for t, data in recorder.events] == [
+        (standin_sd.kScanEvent, 'first'), (standin_sd.kScanEvent, 'B'),
+        (standin_sd.kScanEvent, 'C'), (standin_sd.kConnectionEvent, 'C')]
+    stats = monitor.stats()
+    assert stats['coalesced'] == 1 and stats['dropped'] == 1
+
+
+def test_overflow_block_waits_for_the_listener(wireless, pm):
+    monitor = wireless.SDKEventMonitor(queue_size=1, overflow='block', workers=1)
+    gate = threading.Event()
+    recorder = Recorder(gate)
+    monitor.subscribe(recorder)
+    monitor.notify(standin_sd.kScanEvent, scan('A', 0))
+    assert recorder.entered.wait(5.0)
+    monitor.notify(standin_sd.kScanEvent, scan('A', 1))
+    blocked = threading.Thread(target=monitor.notify, args=(standin_sd.kScanEvent, scan('A', 2)), daemon=True)
+    blocked.start()
+    blocked.join(0.1)
+    assert blocked.is_alive()
+    gate.set()
+    blocked.join(5.0)
+    assert not blocked.is_alive()
+    assert recorder.wait_for(3)
+    assert [data['RSSI'] for _, data in recorder.events] == [0, 1, 2]
+    assert monitor.stats()['dropped'] == 0
+
+
+def test_overflow_block_is_released_by_unsubscribing(wireless, pm):
+    monitor = wireless.SDKEventMonitor(queue_size=1, overflow='block', workers=1)
+    gate = threading.Event()
+    recorder = Recorder(gate)
+    monitor.subscribe(recorder)
+    monitor.notify(standin_sd.kScanEvent, scan('A', 0))
+    assert recorder.entered.wait(5.0)
+    monitor.notify(standin_sd.kScanEvent, scan('A', 1))
+    blocked = threading.Thread(target=monitor.notify, args=(standin_sd.kScanEvent, scan('A', 2)), daemon=True)
+    blocked.start()
+    blocked.join(0.1)
+    monitor.remove_listener(recorder)
+    blocked.join(5.0)
+    assert not blocked.is_alive()
+    gate.set()
+    assert recorder.wait_for(1)
+    # Nothing queued by (or after) the blocked notify is delivered
+    assert not recorder.wait_for(2, timeout=0.2)
+    assert [data['RSSI'] for _, data in recorder.events] == [0]
+
+
+def test_stats_and_skipped_events(wireless, pm):
+    monitor = wireless.SDKEventMonitor(workers=1)
+    recorder = Recorder()
+    monitor.subscribe(recorder, event_types=(standin_sd.kScanEvent,), device_id='A')
+    monitor.ingest(standin_sd.connection_event('A', standin_sd.kConnected))
+    monitor.ingest(standin_sd.scan_event('B'))
+    monitor.ingest(standin_sd.scan_event('A'))
+    assert recorder.wait_for(1)
+    stats = monitor.stats()
+    assert stats['skipped'] == 1 and stats['ingested'] == 2
+    assert stats['delivered'] == 1 and stats['dispatch_latency']['count'] == 1
+    assert recorder.events[0][1]['DeviceID'] == 'A'
+
+
+def test_listeners_are_given_plain_dicts(wireless, pm):
+    import json
+    monitor = wireless.SDKEventMonitor(workers=2)
+    recorder = Recorder()
+    monitor.subscribe(recorder)
+    scanned = []
+    done = threading.Event()
+    handler = wireless.ScanResultHandler(lambda data: (scanned.append(data), done.set()), listen=False)
+    monitor.subscribe(handler)
+    monitor.ingest(standin_sd.scan_event('A', rssi=-50, side=1))
+    assert recorder.wait_for(1) and done.wait(5.0)
+    data = scanned[0]
+    assert type(data) is dict
+    assert json.loads(json.dumps(data))['DeviceID'] == 'A'
+    assert data['ManufacturingData']['side'] == 1
+
+
+def scan_ends(pm):
+    return getattr(pm, 'calls', {}).get('EndScanForWirelessDevices', 0)
+
+
+def test_scan_stops_after_max_results(wireless, pm):
+    pm.scan_events = [standin_sd.scan_event(device_id) for device_id in 'ABCD']
+    scan = wireless.WirelessScan(standin_sd.kRSL10, predicate=lambda e: e['DeviceID'] != 'A', max_results=2)
+    assert [e['DeviceID'] for e in scan] == ['B', 'C']
+    assert scan_ends(pm) == 1
+    assert scan.stop() == scan.results and scan_ends(pm) == 1
+
+
+def test_scan_ends_once_however_iteration_ends(wireless, pm):
+    pm.scan_events = [standin_sd.scan_event(device_id) for device_id in 'ABCD']
+    # Timeout
+    assert list(wireless.WirelessScan(standin_sd.kRSL10, timeout=0.1, max_results=10)) != []
+    assert scan_ends(pm) == 1
+    # break (ended by the with block)
+    with wireless.WirelessScan(standin_sd.kRSL10) as scan:
+        for _ in scan:
+            break
+    assert scan_ends(pm) == 2
+    # Generator closed
+    events = iter(wireless.WirelessScan(standin_sd.kRSL10))
+    next(events)
+    events.close()
+    assert scan_ends(pm) == 3
+    # Exception
+    with pytest.raises(ValueError):
+        with wireless.WirelessScan(standin_sd.kRSL10) as scan:
+            for _ in scan:
+                raise ValueError()
+    assert scan_ends(pm) == 4
+    # Never iterated
+    with wireless.WirelessScan(standin_sd.kRSL10):
+        pass
+    assert scan_ends(pm) == 5
+    assert pm.calls['BeginScanForWirelessDevices'] == 5
+
+
+def test_stop_ends_a_waiting_scan(wireless, pm):
+    import asyncio
+    pm.scan_events = []
+    scan = wireless.WirelessScan(standin_sd.kRSL10)
+    consumer = threading.Thread(target=list, args=(scan,), daemon=True)
+    consumer.start()
+    consumer.join(0.1)
+    assert consumer.is_alive()
+    scan.stop()
+    consumer.join(5.0)
+    assert not consumer.is_alive()
+    assert scan_ends(pm) == 1
+
+    async def consume(scan):
+        return [event async for event in scan]
+
+    scan = wireless.WirelessScan(standin_sd.kRSL10)
+    threading.Timer(0.1, scan.stop).start()
+    assert asyncio.run(asyncio.wait_for(consume(scan), 5.0)) == []
+    assert scan_ends(pm) == 2
+
+
+def test_scan_async_iterator(wireless, pm):
+    import asyncio
+    pm.scan_events = [standin_sd.scan_event(device_id) for device_id in 'ABC']
+
+    async def first(device_id):
+        async for event in wireless.WirelessScan(standin_sd.kRSL10, max_results=1,
+                                                 predicate=lambda e: e['DeviceID'] == device_id):
+            return event
+
+    assert asyncio.run(first('B'))['DeviceID'] == 'B'
+    assert scan_ends(pm) == 1
+
+    async def until_timeout():
+        return [event async for event in wireless.WirelessScan(standin_sd.kRSL10, timeout=0.2)]
+
+    assert [e['DeviceID'] for e in asyncio.run(until_timeout())] == ['A', 'B', 'C']
+    assert scan_ends(pm) == 2
+
+
+def test_scan_registry(wireless):
+    import time
+    registry = wireless.ScanRegistry(ttl=10.0, rssi_smoothing=0.5)
+    assert registry.record({'RSSI': -50}) is None
+    registry.record({'DeviceID': 'A', 'RSSI': '-80', 'ManufacturingData': {'side': 0}})
+    record = registry.record({'DeviceID': 'A', 'RSSI': -60, 'ManufacturingData': 'unparsed'})
+    assert record.count == 2 and record.rssi == -70.0 and record.last_rssi == -60.0
+    # The side is kept from the last event that had it
+    assert record.side == 0
+    registry.record({'DeviceID': 'B', 'RSSI': -65, 'ManufacturingData': {'side': 1}})
+    registry.record({'DeviceID': 'C', 'ManufacturingData': {'side': 1}})
+    registry.record({'DeviceID': 'D', 'RSSI': 'n/a'})
+    assert len(registry) == 4 and 'A' in registry and 'E' not in registry
+
+    assert [r.device_id for r in registry.strongest(n=3)] == ['B', 'A']
+    assert [r.device_id for r in registry.strongest(side=0)] == ['A']
+    assert sorted(r.device_id for r in registry.devices(side=1)) == ['B', 'C']
+
+    # Records not seen for ttl seconds are evicted, and max_age narrows lookups
+    registry._records['B'].last_seen -= 5.0
+    assert registry.get('B', max_age=1.0) is None and registry.get('B') is not None
+    assert [r.device_id for r in registry.strongest(max_age=1.0)] == ['A']
+    assert registry.evict(now=time.monotonic() + 6.0) == 1
+    assert 'B' not in registry and len(registry) == 3
+    registry.clear()
+    assert len(registry) == 0
+
+
+def test_orchestrator_schedules_per_programmer(wireless, pm):
+    import time
+    from sd_sdk_python.sd_sdk_orchestrator import FittingOrchestrator
+
+    class Adaptor:
+        def __init__(self, device_id):
+            self.device_id = device_id
+
+    lock = threading.Lock()
+    active = {}
+    peak = {}
+    released = []
+
+    def operation(adaptor):
+        programmer = adaptor.device_id[0]
+        with lock:
+            active[programmer] = active.get(programmer, 0) + 1
+            peak[programmer] = max(peak.get(programmer, 0), active[programmer])
+        time.sleep(0.1)
+        with lock:
+            active[programmer] -= 1
+        if adaptor.device_id == 'B3':
+            raise RuntimeError("fitting failed")
+        return adaptor.device_id.lower()
+
+    orchestrator = FittingOrchestrator(standin_sd.kRSL10, max_concurrency=2, per_programmer=1,
+                                       connect=Adaptor, release=released.append)
+    devices = [(f'{p}{i}', p) for p in 'AB' for i in range(1, 4)]
+    report = orchestrator.run(devices, operation)
+    # Both programmers are kept busy: 3 rounds of 0.1s rather than 5
+    assert report.wall_seconds < 0.45
+    assert peak == {'A': 1, 'B': 1}
+    assert [r.device_id for r in report.results] == [d for d, _ in devices]
+    assert [r.result for r in report.succeeded] == ['a1', 'a2', 'a3', 'b1', 'b2']
+    assert [r.device_id for r in report.failed] == ['B3']
+    assert len(released) == 6
+    assert report.serial_seconds_estimate >= 0.6 and report.to_dict()['devices'][5]['ok'] is False
+
+
+def test_orchestrator_rejects_per_programmer_below_one(wireless):
+    from sd_sdk_python.sd_sdk_orchestrator import FittingOrchestrator
+    with pytest.raises(ValueError):
+        FittingOrchestrator(standin_sd.kRSL10, per_programmer=0)
+
+
+class PoolAdaptor(object):
+    """Stands in for a connected WirelessCommAdaptor"""
+    def __init__(self, device_id, connects):
+        self.device_id = device_id
+        self.state = standin_sd.kConnected
+        self.closed = False
+        connects.append(device_id)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize('max_connections', [1, 2])
+def test_pool_waiters_for_the_same_device_share_one_connection(wireless, pm, max_connections):
+    import time
+    connects = []
+    pool = wireless.WirelessConnectionPool(standin_sd.kRSL10, max_connections=max_connections, idle_timeout=None,
+                                           wait_timeout=5.0, connect=lambda d: PoolAdaptor(d, connects))
+    held = [pool.acquire(device_id) for device_id in 'XZ'[:max_connections]]
+    got = []
+
+    def use_y():
+        adaptor = pool.acquire('Y')
+        got.append(adaptor)
+        time.sleep(0.05)
+        pool.release(adaptor)
+
+    threads = [threading.Thread(target=use_y, daemon=True) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    # Both wait for room in the full pool
+    time.sleep(0.1)
+    assert got == []
+    pool.release(held[0])
+    for thread in threads:
+        thread.join(5.0)
+        assert not thread.is_alive()
+    assert connects == list('XZ'[:max_connections]) + ['Y']
+    assert len(got) == 2 and got[0] is got[1] and not got[0].closed
+    assert held[0].closed
+    assert len(pool) == max_connections and 'Y' in pool
+    assert (pool.stats.hits, pool.stats.misses, pool.stats.evictions) == (1, max_connections + 1, 1)
+    pool.close()
+    assert got[0].closed
+
+
+def test_pool_reuses_and_revalidates(wireless, pm):
+    connects = []
+    pool = wireless.WirelessConnectionPool(standin_sd.kRSL10, idle_timeout=None,
+                                           connect=lambda d: PoolAdaptor(d, connects))
+    with pool.connection('A') as adaptor:
+        pass
+    with pool.connection('A') as again:
+        assert again is adaptor
+    # Dropped while pooled: replaced
+    adaptor.state = standin_sd.kDisconnected
+    with pool.connection('A') as replaced:
+        assert replaced is not adaptor and adaptor.closed
+    with pytest.raises(ValueError):
+        with pool.connection('A'):
+            raise ValueError()
+    assert replaced.closed and 'A' not in pool
+    assert connects == ['A', 'A'] and pool.stats.stale == 1
+    pool.close()
+
+
+def test_dropped_pool_is_collected(wireless, pm):
+    import weakref
+    pool = wireless.WirelessConnectionPool(standin_sd.kRSL10, idle_timeout=0.02,
+                                           connect=lambda d: PoolAdaptor(d, []))
+    reaper = pool._reaper
+    pool_ref = weakref.ref(pool)
+    del pool
+    # The reaper holds the pool for a moment while it evicts
+    for _ in range(10):
+        gc.collect()
+        if pool_ref() is None:
+            break
+        reaper.join(0.01)
+    assert pool_ref() is None
+    reaper.join(5.0)
+    assert not reaper.is_alive()
+
+
+def test_adaptor_delegates_to_the_interface(wireless, pm):
+    adaptor = wireless.WirelessCommAdaptor('A')
+    interface = adaptor.com_adaptor
+    # Methods are looked up once and then cached on the adaptor
+    assert adaptor.CloseDevice == interface.CloseDevice
+    assert 'CloseDevice' in vars(adaptor)
+    # Other values are read through every time
+    assert adaptor.VerifyNvmWrites is False
+    interface.VerifyNvmWrites = True
+    assert adaptor.VerifyNvmWrites is True and 'VerifyNvmWrites' not in vars(adaptor)
+    # The adaptor's own attributes win, and dunders are never delegated
+    assert adaptor.device_id == 'A' and adaptor.close.__self__ is adaptor
+    with pytest.raises(AttributeError):
+        adaptor.NoSuchMethod
+    assert not hasattr(adaptor, '__len__')
+
+
+def test_add_listener_with_the_id_of_a_collected_one(wireless, pm):
+    monitor = wireless.SDKEventMonitor(workers=1)
+    recorder = Recorder()
+    stale_id = id(recorder)
+    monitor.add_listener(recorder)
+    # Freed (its weak reference callback has run) but not pruned yet
+    del recorder
+    assert stale_id in monitor._subscriptions
+    recorders = [Recorder() for _ in range(1000)]
+    reused = next((r for r in recorders if id(r) == stale_id), None)
+    if reused is None:
+        pytest.skip("The collected listener's id was not reused")
+    monitor.add_listener(reused)
+    assert monitor.listeners == [reused]
+    monitor.notify(standin_sd.kScanEvent, scan('A'))
+    assert reused.wait_for(1)
+    # Removing a listener that was never added leaves the others alone
+    monitor.remove_listener(Recorder())
+    monitor.remove_listener(reused)
+    assert monitor.listeners == [] and monitor._routes == {}